@@ -0,0 +1,618 @@
+"""Script to benchmark JParty hot paths"""
+
+from jparty.constants import SAVED_GAMES, BUZZ_WINDOW
+from pathlib import Path
+import argparse
+import random
+import time
+import os
+
+
+def compare(a, b, path=""):
+    """Yield the paths at which two nested structures differ"""
+    if isinstance(a, dict) and isinstance(b, dict):
+        for key in sorted(set(a) | set(b)):
+            yield from compare(a.get(key), b.get(key), f"{path}.{key}")
+    elif isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        if len(a) != len(b):
+            yield f"{path} (length {len(a)} != {len(b)})"
+        for i, (x, y) in enumerate(zip(a, b)):
+            yield from compare(x, y, f"{path}[{i}]")
+    elif a != b:
+        yield f"{path}: {a!r} != {b!r}"
+
+
+def bench_parse(args):
+    from jparty.retrieve import (
+        lxml,
+        process_game_board_from_html_bs4,
+        process_game_board_from_html_lxml,
+    )
+    from jparty.corpus import game_to_dict
+
+    pages = []
+    for html_path in sorted(args.directory.glob("*.html"))[: args.limit]:
+        pages.append((html_path.stem, html_path.read_text(encoding="utf-8")))
+    if not pages:
+        print(f"No saved pages in {args.directory}")
+        return
+
+    parsers = {"bs4": process_game_board_from_html_bs4}
+    if lxml is not None:
+        parsers["lxml"] = process_game_board_from_html_lxml
+    else:
+        print("lxml is not installed, only benchmarking bs4")
+
+    results = {}
+    for name, parse in parsers.items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            results[name] = [parse(html, game_id) for game_id, html in pages]
+        elapsed = time.perf_counter() - start
+        rate = len(pages) * args.repeat / elapsed
+        print(f"{name:>5}: {rate:8.1f} pages/sec ({len(pages)} pages x {args.repeat})")
+
+    if "lxml" in results:
+        mismatches = 0
+        for (game_id, _), slow, fast in zip(pages, results["bs4"], results["lxml"]):
+            slow = game_to_dict(slow) if slow is not None else None
+            fast = game_to_dict(fast) if fast is not None else None
+            for diff in compare(slow, fast):
+                mismatches += 1
+                print(f"{game_id}{diff}")
+        print("outputs match" if mismatches == 0 else f"{mismatches} fields differ")
+
+
+def qapplication():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication([])
+
+
+def sample_texts(n, seed=0):
+    """Clue-length strings of random words"""
+    rng = random.Random(seed)
+    words = "the of this was in a capital river famous author who first novel state king war".split()
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(3, 40))).upper() for _ in range(n)]
+
+
+def bench_autofit(args):
+    app = qapplication()
+    from PyQt6.QtGui import QFont, QFontMetrics
+    from PyQt6.QtCore import Qt, QRect
+    from jparty.utils import fit_font_size
+
+    def linear_fit(text, width, height, flags, font_key, initial):
+        """The decrement-by-one search fit_font_size replaced"""
+        rect = QRect(0, 0, width, height)
+        font = QFont()
+        font.fromString(font_key)
+        size = initial
+        font.setPixelSize(size)
+        if rect.contains(QFontMetrics(font).boundingRect(rect, flags, text)):
+            return size
+        while size > 2:
+            size -= 1
+            font.setPixelSize(size)
+            if rect.contains(QFontMetrics(font).boundingRect(rect, flags, text)):
+                return size
+        return size
+
+    font = QFont("ITC_ Korinna")
+    font.setPixelSize(1)
+    font_key = font.toString()
+    flags = Qt.TextFlag.TextWordWrap | Qt.AlignmentFlag.AlignCenter
+    # a 4K projector question screen and a board card
+    sizes = [(3400, 1600, 170), (560, 300, 150)]
+    cases = [
+        (text, w, h, flags, font_key, initial)
+        for text in sample_texts(args.texts)
+        for w, h, initial in sizes
+    ]
+
+    results = {}
+    for name, fit in [
+        ("linear", linear_fit),
+        ("bisect", fit_font_size.__wrapped__),
+        ("cached", fit_font_size),
+    ]:
+        fit_font_size.cache_clear()
+        fit(*cases[0])
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            results[name] = [fit(*case) for case in cases]
+        elapsed = time.perf_counter() - start
+        rate = len(cases) * args.repeat / elapsed
+        print(f"{name:>6}: {rate:10.1f} fits/sec ({len(cases)} fits x {args.repeat})")
+
+    differ = sum(a != b for a, b in zip(results["linear"], results["bisect"]))
+    print("sizes match" if differ == 0 else f"{differ} sizes differ")
+
+
+def bench_paint(args):
+    app = qapplication()
+    from PyQt6.QtWidgets import QWidget, QGridLayout
+    from PyQt6.QtCore import Qt
+    from jparty.style import CARDPAL
+    from jparty.utils import DynamicLabel, add_shadow, _shadow_cache
+
+    def board(effect):
+        """A 6x6 board of shadowed card labels at projector size"""
+        widget = QWidget()
+        widget.setPalette(CARDPAL)
+        widget.setAutoFillBackground(True)
+        grid = QGridLayout(widget)
+        categories = sample_texts(6, seed=1)
+        for x in range(6):
+            for y in range(6):
+                text = categories[x] if y == 0 else f"${200 * y}"
+                # set up like style.MyLabel
+                label = DynamicLabel(text, lambda: 60, widget)
+                label.setWordWrap(True)
+                label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+                label.setAutosizeMargins(0.1)
+                if effect:
+                    add_shadow(label)
+                else:
+                    label.setTextShadow()
+                grid.addWidget(label, y, x)
+        widget.resize(args.width, args.height)
+        widget.show()
+        app.processEvents()
+        return widget
+
+    for name, effect in [("effect", True), ("cached", False)]:
+        widget = board(effect)
+        _shadow_cache.clear()
+        widget.grab()  # first paint fills the cache
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            widget.grab()
+        elapsed = time.perf_counter() - start
+        print(f"{name:>6}: {1000 * elapsed / args.repeat:8.2f} ms per full board paint")
+        widget.close()
+
+
+def bench_timer(args):
+    app = qapplication()
+    from PyQt6.QtCore import QTimer
+    from jparty.game import QuestionTimer
+
+    rng = random.Random(0)
+    errors = []
+    late_calls = []  # callbacks from timers that were cancelled
+
+    def trial():
+        """Pause and resume a timer at random for `churn` cycles and compare
+        when it fires against interval + time spent paused. Alongside it, a
+        second timer is cancelled partway through and must never fire."""
+        paused = 0.0
+        pause_start = None
+        begin = time.monotonic()
+
+        def fired():
+            errors.append(time.monotonic() - begin - paused - args.interval)
+            # doomed was due at interval / 2, give it time to misfire
+            QTimer.singleShot(50, app.quit)
+
+        timer = QuestionTimer(args.interval, fired)
+        doomed = QuestionTimer(args.interval / 2, late_calls.append, 1)
+        timer.start()
+        doomed.start()
+
+        def cancel():
+            if rng.random() < 0.5:
+                doomed.cancel()
+            else:
+                doomed.pause()
+                doomed.cancel()
+                doomed.resume()  # must not bring it back
+
+        def churn(n):
+            nonlocal paused, pause_start
+            if not timer.running and pause_start is not None:
+                paused += time.monotonic() - pause_start
+                pause_start = None
+                timer.resume()
+            elif n > 0 and timer.remaining() > 0.1:
+                pause_start = time.monotonic()
+                timer.pause()
+            if n > 0:
+                QTimer.singleShot(rng.randint(1, 20), lambda: churn(n - 1))
+
+        QTimer.singleShot(rng.randint(1, 20), lambda: churn(args.churn))
+        QTimer.singleShot(int(rng.uniform(0, 500 * args.interval)), cancel)
+        app.exec()
+
+    for _ in range(args.trials):
+        trial()
+    errors_ms = sorted(1000 * e for e in errors)
+    mean = sum(errors_ms) / len(errors_ms)
+    print(f"fire error over {args.trials} trials x {args.churn} pause/resume cycles:")
+    print(f"  mean {mean:.2f} ms, min {errors_ms[0]:.2f} ms, max {errors_ms[-1]:.2f} ms")
+
+    worst = max(abs(e) for e in errors_ms)
+    if worst > args.tolerance:
+        raise SystemExit(f"FAIL: a timer fired {worst:.2f} ms off, tolerance is {args.tolerance} ms")
+    if late_calls:
+        raise SystemExit(f"FAIL: {len(late_calls)} cancelled timers called back")
+    print(f"OK: every timer within {args.tolerance} ms, no callbacks after cancel()")
+
+
+def bench_wire(args):
+    import json
+    import asyncio
+    import tornado.web
+    import tornado.httpserver
+    import tornado.websocket
+    from tornado.testing import bind_unused_port
+    from jparty import frames
+
+    def json_encode(msg, text=""):
+        return json.dumps({"message": msg, "text": text})
+
+    cases = [
+        ("binary", lambda: frames.encode("BUZZ", 123456.789), frames.decode),
+        ("json", lambda: json_encode("BUZZ", "123456.789"), json.loads),
+    ]
+    for name, encode, decode in cases:
+        frame = encode()
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            decode(encode())
+        elapsed = time.perf_counter() - start
+        print(f"{name:>6}: {len(frame):3d} byte BUZZ, {1e6 * elapsed / args.repeat:.2f} us encode+decode")
+
+    class LockHandler(tornado.websocket.WebSocketHandler):
+        """answers every buzz with a lock, like BuzzerSocketHandler"""
+
+        def initialize(self, compression):
+            self.compression = compression
+
+        def get_compression_options(self):
+            return self.compression
+
+        def on_message(self, message):
+            if isinstance(message, bytes):
+                frames.decode(message)
+                self.write_message(frames.encode("BUZZ_WON"), binary=True)
+            else:
+                json.loads(message)
+                self.write_message(json_encode("BUZZ_WON"))
+
+    async def round_trips(port, compression, binary):
+        url = f"ws://127.0.0.1:{port}/{'deflate' if compression is not None else 'plain'}"
+        conn = await tornado.websocket.websocket_connect(url, compression_options=compression)
+        times = []
+        for _ in range(args.buzzes):
+            start = time.perf_counter()
+            if binary:
+                conn.write_message(frames.encode("BUZZ", 123456.789), binary=True)
+            else:
+                conn.write_message(json_encode("BUZZ", "123456.789"))
+            await conn.read_message()
+            times.append(time.perf_counter() - start)
+        conn.close()
+        return sorted(times)
+
+    async def main():
+        app = tornado.web.Application(
+            [
+                (r"/plain", LockHandler, {"compression": None}),
+                (r"/deflate", LockHandler, {"compression": {}}),
+            ]
+        )
+        sock, port = bind_unused_port()
+        server = tornado.httpserver.HTTPServer(app)
+        server.add_sockets([sock])
+        for compression in [None, {}]:
+            for binary in [True, False]:
+                times = await round_trips(port, compression, binary)
+                name = f"{'binary' if binary else 'json'}, {'deflate' if compression is not None else 'no compression'}"
+                print(
+                    f"{name:>22}: buzz round trip median {1e6 * times[len(times) // 2]:.0f} us, "
+                    f"p95 {1e6 * times[int(len(times) * 0.95)]:.0f} us"
+                )
+        server.stop()
+
+    asyncio.run(main())
+
+
+def bench_arbiter(args):
+    import queue
+    import asyncio
+    import threading
+    from tornado.ioloop import IOLoop
+    from jparty.arbiter import BuzzArbiter, LatencyStats
+
+    class BusyGui(threading.Thread):
+        """Stands in for the GUI thread: runs queued calls between frames
+        that each keep it busy for up to `gui_busy` ms"""
+
+        def __init__(self):
+            super().__init__(name="gui", daemon=True)
+            self.calls = queue.Queue()
+            self.rng = random.Random(0)
+
+        def run(self):
+            while True:
+                time.sleep(self.rng.uniform(0, args.gui_busy) / 1000)
+                while not self.calls.empty():
+                    self.calls.get()()
+
+    class Controller(object):
+        def __init__(self, io_loop):
+            self.io_loop = io_loop
+
+        def lock(self, winner):
+            pass
+
+        def unlock(self, exclude=None):
+            pass
+
+        def buzz_won(self, player, received):
+            pass
+
+        def buzz_hint(self, player):
+            pass
+
+    class FakePlayer(object):
+        player_number = 0
+
+    async def main():
+        io_loop = IOLoop.current()
+        gui = BusyGui()
+        gui.start()
+        arbiter = BuzzArbiter(Controller(io_loop), window=args.window)
+        through_gui = LatencyStats(args.buzzes)
+        player = FakePlayer()
+        for _ in range(args.buzzes):
+            arbiter._open(None)
+            received = time.monotonic()
+            # after: the arbiter locks on the IOLoop
+            arbiter.buzz(player, received)
+            # before: the buzz went to the GUI thread, which decided and
+            # handed the lock back to the IOLoop
+            decided = asyncio.get_running_loop().create_future()
+
+            def locked(received=received, decided=decided):
+                through_gui.add(time.monotonic() - received)
+                decided.set_result(None)
+
+            gui.calls.put(lambda locked=locked: io_loop.add_callback(locked))
+            await decided
+            await asyncio.sleep(args.window + 0.005)  # let the arbiter decide too
+
+        print(
+            f"buzz to lock over {args.buzzes} buzzes, GUI busy for up to {args.gui_busy} ms "
+            f"a frame, arbiter window {1000 * args.window:.0f} ms:"
+        )
+        for name, stats in [("before, via GUI", through_gui), ("after, arbiter", arbiter.lock_latency)]:
+            summary = stats.summary()
+            print(
+                f"{name:>16}: p50 {summary['p50']:.2f} ms, p95 {summary['p95']:.2f} ms, "
+                f"max {summary['max']:.2f} ms"
+            )
+
+    asyncio.run(main())
+
+
+def bench_registry(args):
+    import threading
+    from jparty.registry import PlayerRegistry
+
+    class FakePlayer(object):
+        def __init__(self):
+            self.token = os.urandom(15)
+            self.waiter = object()
+            self.player_number = None
+
+        def renumber(self, player_number):
+            self.player_number = player_number
+
+    registry = PlayerRegistry()
+    for _ in range(args.players):
+        registry.add(FakePlayer())
+    players = list(registry.players)
+    tokens = [p.token.hex() for p in players]
+
+    def linear(token):
+        for p in registry.players:
+            if p.token.hex() == token:
+                return p
+
+    for name, lookup in [("linear scan", linear), ("registry", registry.with_token)]:
+        start = time.perf_counter()
+        for i in range(args.lookups):
+            lookup(tokens[i % len(tokens)])
+        elapsed = time.perf_counter() - start
+        print(f"{name:>12}: {1e9 * elapsed / args.lookups:.0f} ns per token lookup")
+
+    # buzzes and reconnects on one thread while the "host" reorders,
+    # removes and re-adds players on another
+    stop = threading.Event()
+    counts = {"buzzes": 0, "missed": 0, "wrong": 0, "reconnects": 0}
+
+    def buzzer():
+        rng = random.Random(1)
+        while not stop.is_set():
+            p = rng.choice(players)
+            if rng.random() < 0.05:
+                registry.reconnect(p, object())
+                counts["reconnects"] += 1
+            found = registry.with_connection(p.waiter)
+            if found is None:
+                found = registry.with_token(p.token.hex())
+            if found is None:
+                counts["missed"] += 1  # removed by the host meanwhile
+            elif found is not p:
+                counts["wrong"] += 1
+            counts["buzzes"] += 1
+
+    thread = threading.Thread(target=buzzer)
+    thread.start()
+    rng = random.Random(2)
+    moves = 0
+    start = time.perf_counter()
+    try:
+        while time.perf_counter() - start < args.seconds:
+            p = rng.choice(players)
+            if rng.random() < 0.1:
+                registry.remove(p)
+                registry.add(p)
+            else:
+                registry.move(p, rng.choice([-1, 1]))
+            moves += 1
+            registry.check()
+    except AssertionError as e:
+        raise SystemExit(f"FAIL: registry indexes inconsistent after {moves} reorders: {e!r}")
+    finally:
+        stop.set()
+        thread.join()
+    print(
+        f"{counts['buzzes']} buzzes and {counts['reconnects']} reconnects during {moves} reorders: "
+        f"{counts['wrong']} wrong players, {counts['missed']} missed while removed, indexes consistent"
+    )
+    if counts["wrong"]:
+        raise SystemExit(f"FAIL: {counts['wrong']} buzzes found the wrong player")
+    if counts["buzzes"] == 0:
+        raise SystemExit("FAIL: no buzzes were looked up during the reorders")
+
+
+def bench_engine(args):
+    from jparty.constants import MONIES
+    from jparty.engine import GameEngine, EngineListener, Player
+    from jparty.gamedata import Question, Board, FinalBoard, GameData
+
+    rng = random.Random(0)
+
+    def game_data():
+        rounds = []
+        for r, dds in enumerate([1, 2]):
+            questions = [
+                Question((i, j), "text", "answer", f"category {i}", MONIES[r][j])
+                for i in range(6)
+                for j in range(5)
+            ]
+            for q in rng.sample(questions, dds):
+                q.dd = True
+            for q in questions:
+                q.actual_results = []
+            rounds.append(Board([f"category {i}" for i in range(6)], questions, dj=r == 1))
+        final = Question((0, 0), "text", "answer", "final", actual_results=[])
+        rounds.append(FinalBoard("final", final))
+        return GameData(rounds, "date", "comments")
+
+    class GameOver(EngineListener):
+        def __init__(self):
+            self.games = 0
+
+        def game_over(self, winners):
+            self.games += 1
+
+    def play(engine, players):
+        engine.start(game_data())
+        while not isinstance(engine.current_round, FinalBoard):
+            for q in engine.current_round.questions:
+                engine.select_question(q)
+                if q.dd:
+                    player = rng.choice(players)
+                    engine.daily_double_wager(player, rng.randint(5, engine.dd_max_wager(player)))
+                    engine.judge(rng.random() < 0.6)
+                    continue
+                engine.open_responses()
+                while engine.accepting_responses:
+                    if rng.random() < 0.2:
+                        engine.time_up()
+                        engine.back_to_board()
+                    elif engine.buzz(rng.choice(players)):
+                        engine.judge(rng.random() < 0.6)
+            engine.next_round()
+
+        for p in players:
+            engine.wager(p, rng.randint(0, max(p.score, 0)))
+        engine.open_final_responses()
+        for p in players:
+            engine.final_answer(p, "answer")
+        engine.final_time_up()
+        while engine.judgement_round < len(players):
+            engine.final_next_player()
+            engine.final_judge(rng.random() < 0.5)
+        engine.final_next_player()
+        for p in players:
+            assert p.score == p.score_by_question[-1], (p.score, p.score_by_question)
+
+    listener = GameOver()
+    start = time.perf_counter()
+    for _ in range(args.games):
+        players = [Player(f"player {i}", None, i) for i in range(args.players)]
+        engine = GameEngine(players)
+        engine.subscribe(listener)
+        play(engine, players)
+    elapsed = time.perf_counter() - start
+    assert listener.games == args.games
+    print(
+        f"{args.games} games with {args.players} players in {elapsed:.2f} s: "
+        f"{args.games / elapsed:.0f} games/s"
+    )
+
+
+parser = argparse.ArgumentParser()
+subparsers = parser.add_subparsers(required=True)
+
+parse_parser = subparsers.add_parser("parse", help="j-archive html parsers")
+parse_parser.add_argument(
+    "directory", nargs="?", help="Directory of saved <game_id>.html files", default=SAVED_GAMES, type=Path
+)
+parse_parser.add_argument("--limit", type=int, default=200, help="Number of pages to use")
+parse_parser.add_argument("--repeat", type=int, default=1)
+parse_parser.set_defaults(func=bench_parse)
+
+autofit_parser = subparsers.add_parser("autofit", help="AutosizeWidget font fitting")
+autofit_parser.add_argument("--texts", type=int, default=100, help="Number of distinct texts")
+autofit_parser.add_argument("--repeat", type=int, default=5)
+autofit_parser.set_defaults(func=bench_autofit)
+
+paint_parser = subparsers.add_parser("paint", help="board repaint with shadowed labels")
+paint_parser.add_argument("--width", type=int, default=1920)
+paint_parser.add_argument("--height", type=int, default=1080)
+paint_parser.add_argument("--repeat", type=int, default=20)
+paint_parser.set_defaults(func=bench_paint)
+
+timer_parser = subparsers.add_parser("timer", help="QuestionTimer accuracy under buzz churn")
+timer_parser.add_argument("--interval", type=float, default=1.0, help="Timer interval in seconds")
+timer_parser.add_argument("--churn", type=int, default=50, help="Pause/resume cycles per trial")
+timer_parser.add_argument("--trials", type=int, default=10)
+timer_parser.add_argument(
+    "--tolerance", type=float, default=15.0, help="Largest allowed fire error in ms before failing"
+)
+timer_parser.set_defaults(func=bench_timer)
+
+wire_parser = subparsers.add_parser("wire", help="buzzer websocket frames")
+wire_parser.add_argument("--repeat", type=int, default=100000, help="Encode/decode iterations")
+wire_parser.add_argument("--buzzes", type=int, default=1000, help="Round trips per format")
+wire_parser.set_defaults(func=bench_wire)
+
+arbiter_parser = subparsers.add_parser("arbiter", help="buzz to lock latency, GUI thread vs arbiter")
+arbiter_parser.add_argument("--buzzes", type=int, default=200)
+arbiter_parser.add_argument("--gui-busy", type=float, default=30.0, help="Longest simulated GUI frame in ms")
+arbiter_parser.add_argument(
+    "--window", type=float, default=BUZZ_WINDOW, help="Arbiter's close call window in seconds"
+)
+arbiter_parser.set_defaults(func=bench_arbiter)
+
+registry_parser = subparsers.add_parser("registry", help="player lookups while players are reordered")
+registry_parser.add_argument("--players", type=int, default=6)
+registry_parser.add_argument("--lookups", type=int, default=200000)
+registry_parser.add_argument("--seconds", type=float, default=2.0, help="Length of the stress test")
+registry_parser.set_defaults(func=bench_registry)
+
+engine_parser = subparsers.add_parser("engine", help="headless simulated games")
+engine_parser.add_argument("--games", type=int, default=2000)
+engine_parser.add_argument("--players", type=int, default=3)
+engine_parser.set_defaults(func=bench_engine)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    args.func(args)
@@ -0,0 +1,7 @@
+"""Script to index the question media folder"""
+
+from jparty.media import build_all_manifests
+from jparty.constants import QUESTION_MEDIA
+
+count = build_all_manifests()
+print(f"Built media manifests for {count} games in {QUESTION_MEDIA}")
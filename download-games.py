@@ -1,23 +1,37 @@
 """Script to download games"""
 
-from jparty.retrieve import get_game_html, process_game_board_from_html
-from jparty.constants import SAVED_GAMES
+from jparty.downloader import BulkDownloader, DownloadJournal, parse_game_ids
 import argparse
-import time
 
 parser = argparse.ArgumentParser()
 parser.add_argument(
-    "game_ids", nargs="*", help="List of all game ids you'd like to download", default=None
+    "game_ids",
+    nargs="+",
+    help="Game ids to download, as single ids, ranges (100-200) or lists (5,7,9)",
+)
+parser.add_argument("--workers", type=int, default=8, help="Concurrent downloads")
+parser.add_argument(
+    "--wayback-rate", type=float, default=4.0, help="Max requests per second to the wayback machine"
+)
+parser.add_argument(
+    "--jarchive-rate", type=float, default=0.5, help="Max requests per second to j-archive"
+)
+parser.add_argument("--retries", type=int, default=3, help="Retries per game, with exponential backoff")
+parser.add_argument(
+    "--restart", action="store_true", help="Ignore the progress journal from previous runs"
 )
 args = parser.parse_args()
 
-for game_id in args.game_ids:
-    print(f"Working on {game_id}")
-    game_html = get_game_html(game_id)
-    game_obj = process_game_board_from_html(game_html, game_id)
-    if (SAVED_GAMES / f"{game_id}.html").exists():
-        print("Game already saved")
-        continue
-    with (SAVED_GAMES / f"{game_id}.html").open("w+", encoding="utf-8") as f:
-        f.write(game_html)
-    time.sleep(5)
\ No newline at end of file
+journal = DownloadJournal()
+if args.restart:
+    journal.status = {}
+
+downloader = BulkDownloader(
+    workers=args.workers,
+    wayback_rate=args.wayback_rate,
+    jarchive_rate=args.jarchive_rate,
+    retries=args.retries,
+    journal=journal,
+)
+counts = downloader.run(parse_game_ids(args.game_ids))
+print(", ".join(f"{status}: {n}" for status, n in sorted(counts.items())))
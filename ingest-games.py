@@ -0,0 +1,15 @@
+"""Script to compile saved game html into the local corpus store"""
+
+from jparty.retrieve import ingest_saved_games
+from jparty.constants import SAVED_GAMES
+from pathlib import Path
+import argparse
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "directory", nargs="?", help="Directory of <game_id>.html files", default=SAVED_GAMES, type=Path
+)
+args = parser.parse_args()
+
+ingested, skipped, failed = ingest_saved_games(args.directory)
+print(f"Ingested {ingested}, unchanged {skipped}, failed {failed}")
@@ -0,0 +1,94 @@
+from PyQt6.QtCore import QObject, QThread, QTimer, Qt, pyqtSignal
+
+import time
+import logging
+from functools import partial
+
+
+class Animation(object):
+    """Handle to an animation started by AnimationScheduler.start"""
+
+    def __init__(self, scheduler, frames):
+        self.scheduler = scheduler
+        self.frames = frames
+        self.timer = None
+        self.due = None
+        self.cancelled = False
+        self.finished = False
+
+    @property
+    def running(self):
+        return not (self.cancelled or self.finished)
+
+    def cancel(self):
+        """Stop the animation. No further frames run once this returns if it is
+        called from the GUI thread, otherwise from the next frame on."""
+        self.cancelled = True
+        if QThread.currentThread() == self.scheduler.thread():
+            self.scheduler.finish(self)
+
+
+class AnimationScheduler(QObject):
+    """Runs animations on the Qt event loop, so they need no threads and only
+    ever touch widgets from the GUI thread.
+
+    An animation is a generator which updates widgets and then yields the
+    number of seconds until its next frame. Frames are scheduled relative to
+    the animation's start, so timer latency does not accumulate."""
+
+    _begin = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.__animations = set()
+        # queued when start() is called off the GUI thread
+        self._begin.connect(self.__begin)
+
+    def start(self, frames):
+        """Start running the generator `frames`, returning its Animation handle"""
+        animation = Animation(self, frames)
+        self._begin.emit(animation)
+        return animation
+
+    def __begin(self, animation):
+        if animation.cancelled:
+            return
+        animation.timer = QTimer(self)
+        animation.timer.setSingleShot(True)
+        animation.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        animation.timer.timeout.connect(partial(self.__frame, animation))
+        animation.due = time.monotonic()
+        self.__animations.add(animation)
+        self.__frame(animation)
+
+    def __frame(self, animation):
+        if animation.cancelled:
+            self.finish(animation)
+            return
+        try:
+            delay = next(animation.frames)
+        except StopIteration:
+            self.finish(animation)
+            return
+        except Exception:
+            logging.exception("animation failed")
+            self.finish(animation)
+            return
+        animation.due += delay
+        wait = max(animation.due - time.monotonic(), 0.0)
+        animation.timer.start(int(round(wait * 1000)))
+
+    def finish(self, animation):
+        animation.finished = True
+        if animation.timer is not None:
+            animation.timer.stop()
+            animation.timer.deleteLater()
+            animation.timer = None
+        self.__animations.discard(animation)
+
+    def cancel_all(self):
+        for animation in list(self.__animations):
+            animation.cancel()
+
+
+animations = AnimationScheduler()
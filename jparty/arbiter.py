@@ -0,0 +1,154 @@
+import time
+import logging
+from collections import deque
+
+from jparty.constants import EARLY_BUZZ_PENALTY, BUZZ_WINDOW
+
+log = logging.getLogger(__name__)
+
+
+class LatencyStats(object):
+    """Rolling window of latency samples, in seconds"""
+
+    def __init__(self, size=1000):
+        self.samples = deque(maxlen=size)
+
+    def add(self, latency):
+        self.samples.append(latency)
+
+    def summary(self):
+        """count, mean, median, 95th percentile and max, in milliseconds"""
+        samples = sorted(self.samples)
+        if not samples:
+            return {"count": 0}
+        n = len(samples)
+        return {
+            "count": n,
+            "mean": 1000 * sum(samples) / n,
+            "p50": 1000 * samples[n // 2],
+            "p95": 1000 * samples[min(int(n * 0.95), n - 1)],
+            "max": 1000 * samples[-1],
+        }
+
+
+class BuzzArbiter(object):
+    """Decides who has buzzed in as soon as the buzz reaches the buzzer server.
+
+    All decisions run on the server's IOLoop thread. The GUI thread only
+    changes the arbiter's state through IOLoop.add_callback, so no locks
+    are needed and a busy GUI never delays who wins.
+
+    Buzzes are ranked by when the phone says they happened, corrected by
+    its ClockSync, so the best connection doesn't win every close call.
+    The winner is picked `window` seconds after the first buzz arrives."""
+
+    IDLE = "idle"  # no question shown, buzzes are practice hints
+    QUESTION = "question"  # question shown but not open, buzzes are early
+    OPEN = "open"
+
+    def __init__(self, controller, penalty=EARLY_BUZZ_PENALTY, window=BUZZ_WINDOW):
+        self.controller = controller
+        self.penalty = penalty
+        self.window = window
+        self.candidates = []  # (stamp, received, player) within the window
+        self.state = BuzzArbiter.IDLE
+        self.excluded = None  # the previous answerer can't buzz in again
+        self.early = set()
+        self.open_time = None
+        self.lock_latency = LatencyStats()
+        self.gui_latency = LatencyStats()
+
+    def __call(self, f, *args):
+        io_loop = self.controller.io_loop
+        if io_loop is None:  # server not running
+            f(*args)
+        else:
+            io_loop.add_callback(f, *args)
+
+    # called from the GUI thread
+
+    def question(self):
+        self.__call(self._set_state, BuzzArbiter.QUESTION)
+
+    def open(self, excluded=None):
+        self.__call(self._open, excluded)
+
+    def close(self):
+        self.__call(self._set_state, BuzzArbiter.QUESTION)
+
+    def reset(self):
+        self.__call(self._reset)
+
+    def submit(self, player):
+        """A buzz that didn't come from a phone, e.g. the host's keyboard"""
+        self.__call(self.buzz, player, time.monotonic())
+
+    # called on the IOLoop thread
+
+    def _set_state(self, state):
+        self.state = state
+
+    def _open(self, excluded):
+        self.state = BuzzArbiter.OPEN
+        self.excluded = excluded
+        self.open_time = time.monotonic()
+        self.candidates = []
+        self.controller.unlock(exclude=excluded)
+
+    def _reset(self):
+        self.state = BuzzArbiter.IDLE
+        self.excluded = None
+        self.early = set()
+        self.open_time = None
+        self.candidates = []
+        self.controller.unlock()
+
+    def buzz(self, player, received, stamp=None):
+        """`received` is the time.monotonic() at which the buzz arrived,
+        `stamp` when it was pressed, on the same clock, if known"""
+        if stamp is None:
+            stamp = received
+        if self.state == BuzzArbiter.IDLE:
+            self.controller.buzz_hint(player)
+        elif self.state == BuzzArbiter.QUESTION or stamp < self.open_time:
+            self.early.add(player)
+            log.info("Early buzz recorded: player %s", player.player_number)
+        elif player is not self.excluded:
+            if player in self.early:
+                elapsed = stamp - self.open_time
+                if elapsed < self.penalty:
+                    log.info(
+                        "Early buzz penalty: player %s ignored (elapsed: %.3fs)",
+                        player.player_number,
+                        elapsed,
+                    )
+                    return
+                self.early.discard(player)
+
+            if any(p is player for _, _, p in self.candidates):
+                return
+            self.candidates.append((stamp, received, player))
+            if len(self.candidates) > 1:
+                return
+            io_loop = self.controller.io_loop
+            if self.window <= 0 or io_loop is None:
+                self._decide()
+            else:
+                io_loop.call_later(self.window, self._decide)
+
+    def _decide(self):
+        candidates, self.candidates = self.candidates, []
+        if self.state != BuzzArbiter.OPEN or not candidates:
+            return
+        stamp, received, player = min(candidates, key=lambda c: c[0])
+        if len(candidates) > 1:
+            log.info(
+                "player %s won a close buzz by %.1f ms",
+                player.player_number,
+                1000 * (sorted(c[0] for c in candidates)[1] - stamp),
+            )
+
+        self.state = BuzzArbiter.QUESTION
+        self.controller.lock(player)
+        self.lock_latency.add(time.monotonic() - received)
+        self.controller.buzz_won(player, received)
@@ -1,15 +1,19 @@
 from PyQt6.QtWidgets import QWidget, QGridLayout
 from PyQt6.QtGui import QPalette
+from PyQt6.QtCore import QTimer
 
 
-from jparty.game import Board
+from jparty.gamedata import Board
 from jparty.style import MyLabel, CARDPAL, JBLUE, DARKBLUE
+from jparty.image_cache import image_cache
 
 
 class CardLabel(QWidget):
     def __init__(self, text, parent=None):
         super().__init__(parent)
 
+        self.board = None
+
         self.label = MyLabel(text, self.startFontSize, parent=self)
         self.label.setAutosizeMargins(0.1)
         self.setPalette(CARDPAL)
@@ -27,6 +31,8 @@ class CardLabel(QWidget):
 
     def resizeEvent(self, event):
         self.label.setGeometry(self.rect())
+        if self.board is not None:
+            self.board.schedule_fit()
 
 
 class CategoryCard(CardLabel):
@@ -107,6 +113,8 @@ class BoardWidget(QWidget):
 
         self.questionwidget = None
         self.question_labels = []
+        self.category_labels = []
+        self.__fit_pending = False
 
         self.grid_layout = QGridLayout()
 
@@ -121,6 +129,7 @@ class BoardWidget(QWidget):
             for y in range(Board.size[1] + 1):
                 if y == 0:
                     label = CategoryCard("")
+                    self.category_labels.append(label)
                     self.grid_layout.addWidget(label, 0, x)
                 else:
                     if self.parent().host():
@@ -129,11 +138,17 @@ class BoardWidget(QWidget):
                         label = QuestionCard(game, None)
                     self.question_labels.append(label)
                     self.grid_layout.addWidget(label, y, x)
+                # the board sizes all card text together in fit_cards
+                label.board = self
+                label.label.autosize_managed = True
 
         self.setLayout(self.grid_layout)
         self.show()
 
     def load_round(self, round):
+        image_cache.prefetch(
+            q.image_url for q in round.questions if q.image and q.image_url
+        )
         gl = self.grid_layout
         for x in range(Board.size[0]):
             for y in range(Board.size[1] + 1):
@@ -144,6 +159,32 @@ class BoardWidget(QWidget):
                     # Questions
                     q = round.get_question(x, y - 1)
                     gl.itemAtPosition(y, x).widget().question = q
+        self.schedule_fit()
+
+    def schedule_fit(self):
+        """Fit card fonts once the current batch of resizes/text changes is done"""
+        if not self.__fit_pending:
+            self.__fit_pending = True
+            QTimer.singleShot(0, self.fit_cards)
+
+    def fit_cards(self):
+        """Give every card of a kind the same font size: the smallest that fits
+        all of their texts. Fits are per distinct text and memoized in
+        fit_font_size, so the host and main boards share them when their
+        cards are the same size."""
+        self.__fit_pending = False
+        for cards in (self.category_labels, self.question_labels):
+            sizes = {}
+            for card in cards:
+                label = card.label
+                text = label.plaintext()
+                if text == "" or label.height() == 0 or text in sizes:
+                    continue
+                sizes[text] = label.autofitsize()
+            if sizes:
+                fontsize = min(sizes.values())
+                for card in cards:
+                    card.label.setFontPixelSize(fontsize)
 
     def resizeEvent(self, event):
         self.grid_layout.setSpacing(self.width() // 150)
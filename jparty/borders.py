@@ -3,9 +3,8 @@ from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
 from PyQt6.QtCore import Qt, QSize
 
 
-from jparty.utils import resource_path
-import time
-from threading import Thread, current_thread
+from jparty.sprites import sprites
+from jparty.animation import animations
 
 
 class Borders(object):
@@ -13,6 +12,7 @@ class Borders(object):
         super().__init__()
         self.left = self.create_widget(parent, -1)
         self.right = self.create_widget(parent, 1)
+        self.__flash_animation = None
 
     def __iter__(self):
         return iter([self.left, self.right])
@@ -22,14 +22,15 @@ class Borders(object):
 
     def __flash(self):
         self.lights(False)
-        time.sleep(0.2)
+        yield 0.2
         self.lights(True)
-        time.sleep(0.2)
+        yield 0.2
         self.lights(False)
 
     def flash(self):
-        self.__flash_thread = Thread(target=self.__flash, name="flash")
-        self.__flash_thread.start()
+        if self.__flash_animation is not None:
+            self.__flash_animation.cancel()
+        self.__flash_animation = animations.start(self.__flash())
 
     def lights(self, val):
         for b in self:
@@ -39,53 +40,60 @@ class Borders(object):
 class HostBorders(Borders):
     def __init__(self, parent):
         super().__init__(parent)
-        self.__active_thread = None
+        self.__hints_animation = None
+        self.__buzz_hint_animation = None
 
     def create_widget(self, parent, d):
         return HostBorderWidget(parent, d)
 
+    def __buzz_hint(self):
+        self.lights(True)
+        yield 0.25
+        self.lights(False)
+
+    def buzz_hint(self):
+        """Briefly light the host's borders, then turn them off"""
+        if self.__buzz_hint_animation is not None:
+            self.__buzz_hint_animation.cancel()
+        self.__buzz_hint_animation = animations.start(self.__buzz_hint())
+
     def __flash_hints(self, key):
-        while self.__active_thread == current_thread():
+        while True:
             for b in self:
                 b.show_hints(key)
-            time.sleep(0.5)
+            yield 0.5
             for b in self:
-               b.hide_hints(key)
-            time.sleep(0.5)
+                b.hide_hints(key)
+            yield 0.5
 
-    def buzz_hint(self):
-        self.__buzz_hint_thread = Thread(target=self.__buzz_hint, name="buzz_hint")
-        self.__buzz_hint_thread.start()
+    def __stop_hints(self):
+        if self.__hints_animation is not None:
+            self.__hints_animation.cancel()
+            self.__hints_animation = None
 
     def arrowhints(self, val):
         for b in self:
             b.colors = val
             b.update()
 
+        self.__stop_hints()
         if val:
-            self.__active_thread = Thread(
-                target=self.__flash_hints, args=("arrow",), name="arrow_hints"
-            )
-            self.__active_thread.start()
+            self.__hints_animation = animations.start(self.__flash_hints("arrow"))
         else:
-            self.__active_thread = None
             for b in self:
                 b.hide_hints("arrow")
 
     def spacehints(self, val):
+        self.__stop_hints()
         if val:
-            self.__active_thread = Thread(
-                target=self.__flash_hints, args=("space",), name="space_hints"
-            )
-            self.__active_thread.start()
+            self.__hints_animation = animations.start(self.__flash_hints("space"))
         else:
-            self.__active_thread = None
             for b in self:
                 b.hide_hints("space")
 
     def closeEvent(self, event):
         super().closeEvent(event)
-        self.__active_hint = None
+        self.__stop_hints()
 
 
 class BorderWidget(QWidget):
@@ -120,10 +128,8 @@ class HostBorderWidget(BorderWidget):
         self.setLayout(self.layout)
 
         self.__hint_images = {
-            "space": QPixmap(resource_path("space.png")),
-            "arrow": QPixmap(
-                resource_path(("right" if d == 1 else "left") + "-arrow.png")
-            ),
+            "space": "space.png",
+            "arrow": ("right" if d == 1 else "left") + "-arrow.png",
         }
 
         self.colors = False
@@ -131,10 +137,11 @@ class HostBorderWidget(BorderWidget):
 
     def show_hints(self, key):
         self.hint_label.setPixmap(
-            self.__hint_images[key].scaled(
+            sprites.scaled(
+                self.__hint_images[key],
                 self.size() * 0.9,
                 Qt.AspectRatioMode.KeepAspectRatio,
-                transformMode=Qt.TransformationMode.SmoothTransformation,
+                dpr=self.devicePixelRatioF(),
             )
         )
 
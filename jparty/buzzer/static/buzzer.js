@@ -8,7 +8,7 @@ var last_buzz = new Date().getTime();
 
 async function buzz() {
     if (!$("#buzzer").prop("disabled")) {
-        send("BUZZ");
+        send_frame(FRAME.BUZZ, performance.now());
         $("#buzzer").prop("disabled", true);
 
         setTimeout(function () {
@@ -64,6 +64,40 @@ function send(msg, text="") {
     var message = {message:msg, text: text};
     updater.socket.send(JSON.stringify(message));
 }
+
+// binary frames for latency-critical messages, see jparty/frames.py
+const FRAME = {BUZZ: 1, BUZZ_WON: 2, LOCKED_OUT: 3, UNLOCK: 4, TOOLATE: 5, PING: 6, PONG: 7};
+
+function send_frame(code, ...fields) {
+    var view = new DataView(new ArrayBuffer(1 + 8 * fields.length));
+    view.setUint8(0, code);
+    fields.forEach(function (field, i) {
+        view.setFloat64(1 + 8 * i, field, true);
+    });
+    updater.socket.send(view.buffer);
+}
+
+function on_frame(buffer) {
+    var view = new DataView(buffer);
+    switch (view.getUint8(0)) {
+        case FRAME.PING:
+            // echo the server's stamp with ours, for clock sync
+            send_frame(FRAME.PONG, view.getFloat64(1, true), performance.now());
+            break;
+        case FRAME.BUZZ_WON:
+            $("#buzzer").removeClass("buzz-locked").addClass("buzz-won");
+            break;
+        case FRAME.LOCKED_OUT:
+            $("#buzzer").removeClass("buzz-won").addClass("buzz-locked");
+            break;
+        case FRAME.UNLOCK:
+            $("#buzzer").removeClass("buzz-won buzz-locked");
+            break;
+        case FRAME.TOOLATE:
+            answerForm();
+            break;
+    }
+}
 function wagerForm() {
     var amount =$("input[name='wager']").val().replace(/[\s,]/g, '');
     if (amount != "") {
@@ -176,8 +210,13 @@ var updater = {
     start: function() {
         var url = "ws://" + location.host + "/buzzersocket";
         updater.socket = new WebSocket(url);
+        updater.socket.binaryType = "arraybuffer";
         updater.socket.onclose = function(event) { location.reload(true); };
         updater.socket.onmessage = function(event) {
+            if (event.data instanceof ArrayBuffer) {
+                on_frame(event.data);
+                return;
+            }
             jsondata = JSON.parse(event.data);
             switch (jsondata.message) {
                 case "GAMEFULL":
@@ -208,9 +247,6 @@ var updater = {
                 case "PROMPTANSWER":
                     load_page("answer");
                     break;
-                case "TOOLATE":
-                    answerForm();
-                    break;
             }
         }
     }
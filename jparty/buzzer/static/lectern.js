@@ -7,6 +7,8 @@ var updater = {
     lightsInterval: null,
     lightsRunning: false,
     currentLightStage: 0,
+    state: {},
+    version: null,
 
     start: function() {
         this.playerNumber = typeof playerNumber !== 'undefined' ? playerNumber : 0;
@@ -36,9 +38,23 @@ var updater = {
     handleMessage: function(jsondata) {
         switch (jsondata.message) {
             case "PLAYER_STATE":
-                updater.updatePlayerState(JSON.parse(jsondata.text));
+                updater.state = jsondata.state;
+                updater.version = jsondata.version;
+                updater.updatePlayerState(updater.state);
+                break;
+            case "PLAYER_DELTA":
+                // deltas only apply on top of the version before them
+                if (updater.version === null || jsondata.version !== updater.version + 1) {
+                    updater.socket.send(JSON.stringify({message: "RESYNC", text: ""}));
+                    break;
+                }
+                Object.assign(updater.state, jsondata.delta);
+                updater.version = jsondata.version;
+                updater.updatePlayerState(updater.state);
                 break;
             case "NO_PLAYER":
+                updater.state = {};
+                updater.version = null;
                 updater.showNoPlayer();
                 break;
             default:
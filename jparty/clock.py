@@ -0,0 +1,49 @@
+import statistics
+from collections import deque
+
+
+class ClockSync(object):
+    """NTP-style estimate of a phone's clock relative to time.monotonic(),
+    from timestamped PING/PONG exchanges. All times are in seconds.
+
+    sample() runs on the IOLoop thread while the host window reads the stats
+    on the GUI thread, so every reader works on a snapshot of `samples`;
+    iterating the live deque while a PONG is appended raises RuntimeError."""
+
+    def __init__(self, window=16):
+        self.samples = deque(maxlen=window)  # (rtt, offset)
+
+    def sample(self, sent, client_time, received):
+        """`sent`/`received` are our clock at PING and PONG, `client_time` is
+        the phone's clock when it answered"""
+        rtt = received - sent
+        offset = client_time - (sent + received) / 2
+        self.samples.append((rtt, offset))
+
+    @property
+    def synced(self):
+        return len(self.samples) > 0
+
+    def offset(self):
+        # the fastest exchange is the least skewed by queueing
+        return min(list(self.samples))[1]
+
+    def rtt(self):
+        samples = list(self.samples)
+        return statistics.mean(rtt for rtt, _ in samples) if samples else None
+
+    def jitter(self):
+        samples = list(self.samples)
+        if len(samples) < 2:
+            return None
+        return statistics.pstdev(rtt for rtt, _ in samples)
+
+    def to_server(self, client_time, received):
+        """When, on our clock, something the phone stamped `client_time` happened.
+        Clamped to at most one worst-case trip before it was `received`."""
+        samples = list(self.samples)
+        if not samples:
+            return received
+        worst_rtt = max(rtt for rtt, _ in samples)
+        offset = min(samples)[1]
+        return min(max(client_time - offset, received - worst_rtt), received)
@@ -10,4 +10,41 @@ SAVED_GAMES = REPO_ROOT / "jparty" / "data" / "saved_games"
 SAVED_GAMES.mkdir(parents=True, exist_ok=True)
 QUESTION_MEDIA = REPO_ROOT / "jparty" / "data" / "question_media"
 QUESTION_MEDIA.mkdir(parents=True, exist_ok=True)
-EARLY_BUZZ_PENALTY = 0.25
\ No newline at end of file
+MEDIA_MANIFESTS = REPO_ROOT / "jparty" / "data" / "media_manifests"
+MEDIA_MANIFESTS.mkdir(parents=True, exist_ok=True)
+IMAGE_CACHE = REPO_ROOT / "jparty" / "data" / "image_cache"
+IMAGE_CACHE.mkdir(parents=True, exist_ok=True)
+IMAGE_CACHE_BYTES = 200 * 2**20
+WIKIMEDIA_CACHE = REPO_ROOT / "jparty" / "data" / "wikimedia_cache.json"
+WIKIMEDIA_CACHE_DAYS = 30
+CORPUS_DB = REPO_ROOT / "jparty" / "data" / "corpus.sqlite3"
+RANDOM_POOL = REPO_ROOT / "jparty" / "data" / "random_pool.json"
+RANDOM_POOL_SIZE = 5
+RANDOM_POOL_DELAY = 0.25  # seconds between the pool's random game draws
+INDEX_RECHECK_DAYS = 30  # re-fetch games known to be incomplete after this long
+EARLY_BUZZ_PENALTY = 0.25
+HEDGE_DELAY = 2.0  # seconds before asking the second game source
+BUZZ_WINDOW = 0.03  # buzzes this close together are ranked by compensated phone time
+CLOCK_SYNC_INTERVAL = 2.0  # seconds between clock sync pings to each phone
+NOISY_JITTER = 0.02  # RTT jitter above which a phone's timing isn't trusted
+SCOREBOARD_JOIN_DELAY = 0.1  # seconds to collect player joins into one scoreboard layout
+# permessage-deflate options per websocket, None turns compression off. It is
+# negotiated per connection, so it applies to every message on that socket,
+# including the JSON state messages sent to phones, not just the binary buzz frames
+WEBSOCKET_COMPRESSION = {
+    "buzzer": None,  # buzzes and locks are a few bytes, deflate only adds latency
+    "lectern": {},
+}
+# logger levels by logger name ("" is the root), overridden by $JPARTY_LOG_LEVELS
+LOG_LEVELS = {
+    "": "DEBUG",
+    "jparty.controller": "INFO",
+    "jparty.arbiter": "INFO",
+    "tornado.access": "WARNING",
+}
+OUTBOUND_MAX_IN_FLIGHT = 32  # unflushed writes per client before holding back more
+OUTBOUND_BACKLOG = 256  # held back writes per client before dropping the oldest
+LOG_MAX_BYTES = 5 * 2**20
+LOG_BACKUPS = 5
+LOG_RATE = 5.0  # records per second per call site, below WARNING
+LOG_BURST = 20
@@ -6,14 +6,22 @@ import tornado.websocket
 from tornado.options import define, options
 
 import os
+import time
 from threading import Thread
 import socket
 
 from jparty.environ import root
 from jparty.game import Player
-from jparty.constants import MAXPLAYERS, PORT
+from jparty.arbiter import BuzzArbiter
+from jparty.clock import ClockSync
+from jparty.fanout import LecternFanout
+from jparty.outbound import OutboundQueue
+from jparty import frames
+from jparty.constants import MAXPLAYERS, PORT, CLOCK_SYNC_INTERVAL, WEBSOCKET_COMPRESSION
 
 
+log = logging.getLogger(__name__)
+
 define("port", default=PORT, help="run on the given port", type=int)
 
 
@@ -46,9 +54,9 @@ class BuzzerHandler(tornado.web.RequestHandler):
     def post(self):
         if not self.get_cookie("test"):
             self.set_cookie("test", "test_val")
-            logging.info("set cookie")
+            log.info("set cookie")
         else:
-            logging.info(f"cookie: {self.get_cookie('test')}")
+            log.info("cookie: %s", self.get_cookie("test"))
         self.render("play.html", messages=BuzzerSocketHandler.cache)
 
 
@@ -59,53 +67,92 @@ class BuzzerSocketHandler(tornado.websocket.WebSocketHandler):
     def initialize(self):
         # self.name = None
         self.controller = self.application.controller
-        self.player = None
+        self.clock = ClockSync()
+        self.__pinger = None
+
+    @property
+    def player(self):
+        """This socket's player, from the registry's connection index. None
+        before NAME/CHECK_IF_EXISTS, once the host removes them, or once they
+        reconnect on another socket."""
+        return self.controller.registry.with_connection(self)
 
     def get_compression_options(self):
-        # Non-None enables compression with default options.
-        return {}
+        return WEBSOCKET_COMPRESSION["buzzer"]
 
     def open(self):
         self.set_nodelay(True)
+        self.ping_clock()
+        self.__pinger = tornado.ioloop.PeriodicCallback(
+            self.ping_clock, CLOCK_SYNC_INTERVAL * 1000
+        )
+        self.__pinger.start()
+
+    def ping_clock(self):
+        self.send_frame("PING", time.monotonic())
+
+    def pong(self, sent, client_ms, received):
+        self.clock.sample(sent, client_ms / 1000, received)
 
     def send(self, msg, text=""):
+        """IOLoop thread only, use the controller's OutboundQueue from elsewhere.
+        Returns write_message's future, or None if it failed."""
         data = {"message": msg, "text": text}
         try:
-            self.write_message(data)
-            logging.info(f"Sent {data}")
+            future = self.write_message(data)
+            log.debug("Sent %s", data)
+            return future
+        except:
+            log.error("Error sending message %s", msg, exc_info=True)
+
+    def send_frame(self, msg, *fields):
+        """send one of the binary messages in frames.FORMATS, like send"""
+        try:
+            return self.write_message(frames.encode(msg, *fields), binary=True)
         except:
-            logging.error(f"Error sending message {msg}", exc_info=True)
+            log.error("Error sending message %s", msg, exc_info=True)
 
     def check_if_exists(self, token):
 
         p = self.controller.player_with_token(token)
         if p is None:
-            logging.info("NEW")
+            log.info("NEW")
             self.send("NEW")
         else:
-            logging.info(f"Reconnected {p}")
-            self.player = p
+            log.info("Reconnected player %s", p.player_number)
             p.connected = True
-            p.waiter = self
+            self.controller.registry.reconnect(p, self)
             self.send("EXISTS", tornado.escape.json_encode(p.state()))
 
     def on_message(self, message):
         # do this first to kill latency
-        if "BUZZ" in message:
-            self.buzz()
+        received = time.monotonic()
+        if isinstance(message, bytes):
+            msg, fields = frames.decode(message)
+            if msg == "BUZZ":
+                self.buzz(received, *fields)
+            elif msg == "PONG":
+                self.pong(*fields, received)
+            else:
+                raise Exception("Unknown message")
             return
+
         parsed = tornado.escape.json_decode(message)
         msg = parsed["message"]
         text = parsed["text"]
-        if msg == "NAME":
+        if msg == "BUZZ":  # phones from before buzzes were binary
+            self.buzz(received, None)
+        elif msg == "NAME":
             self.init_player(text)
         elif msg == "CHECK_IF_EXISTS":
-            logging.info(f"Checking if {text} exists")
+            log.info("Checking if %s exists", text)
             self.check_if_exists(text)
         elif msg == "WAGER":
             self.wager(text)
         elif msg == "ANSWER":
-            self.application.controller.answer(self.player, text)
+            player = self.player
+            if player is not None:
+                self.application.controller.answer(player, text)
 
         else:
             raise Exception("Unknown message")
@@ -113,33 +160,41 @@ class BuzzerSocketHandler(tornado.websocket.WebSocketHandler):
     def init_player(self, name):
 
         if not self.controller.accepting_players:
-            logging.info("Game started!")
+            log.info("Game started!")
             self.send("GAMESTARTED")
             return
 
-        if len(self.controller.connected_players) >= MAXPLAYERS:
+        if len(self.controller.registry) >= MAXPLAYERS:
             self.send("FULL")
             return
-        player_index = len(self.controller.connected_players)
-        self.player = Player(name, self, player_index)
-        self.application.controller.new_player(self.player)
-        logging.info(
-            f"New Player: {self.player} {self.request.remote_ip} {self.player.token.hex()}"
-        )
-        self.send("TOKEN", self.player.token.hex())
-
-    def buzz(self):
-        self.application.controller.buzz(self.player)
+        player = Player(name, self, len(self.controller.registry))
+        self.application.controller.new_player(player)
+        log.info("New Player: %s %s %s", player, self.request.remote_ip, player.token.hex())
+        self.send("TOKEN", player.token.hex())
+
+    def buzz(self, received, client_ms):
+        player = self.player
+        if player is None:
+            return
+        if client_ms is None:
+            stamp = received
+        else:
+            stamp = self.clock.to_server(client_ms / 1000, received)
+        self.application.controller.buzz(player, received, stamp)
 
     def wager(self, text):
-        self.application.controller.wager(self.player, int(text))
-        self.player.page = "null"
+        player = self.player
+        if player is None:
+            return
+        self.application.controller.wager(player, int(text))
+        player.page = "null"
 
     def toolate(self):
-        self.send("TOOLATE")
+        self.send_frame("TOOLATE")
 
     def on_close(self):
-        pass
+        if self.__pinger is not None:
+            self.__pinger.stop()
 
 
 class LecternHandler(tornado.web.RequestHandler):
@@ -154,7 +209,7 @@ class LecternSocketHandler(tornado.websocket.WebSocketHandler):
         self.player_number = None
 
     def get_compression_options(self):
-        return {}
+        return WEBSOCKET_COMPRESSION["lectern"]
 
     def open(self):
         self.set_nodelay(True)
@@ -164,38 +219,45 @@ class LecternSocketHandler(tornado.websocket.WebSocketHandler):
             self.player_number = int(player_arg)
             if self.player_number < 0 or self.player_number >= MAXPLAYERS:
                 raise ValueError(f"Player number {self.player_number} out of range")
-            logging.info(f"Lectern connected for player {self.player_number}")
+            log.info("Lectern connected for player %s", self.player_number)
             self.controller.lectern_connections[self.player_number] = self
             self.send_initial_state()
         except (ValueError, TypeError) as e:
-            logging.error(f"Invalid player number for lectern: {e}")
+            log.error("Invalid player number for lectern: %s", e)
             self.close()
 
     def send(self, msg, text=""):
         data = {"message": msg, "text": text}
         try:
-            self.write_message(data)
-            logging.info(f"Sent to lectern {self.player_number}: {data}")
+            future = self.write_message(data)
+            log.debug("Sent to lectern %s: %s", self.player_number, data)
+            return future
+        except:
+            log.error(
+                "Error sending message to lectern %s: %s", self.player_number, msg, exc_info=True
+            )
+
+    def send_encoded(self, data):
+        """send an already JSON encoded message"""
+        try:
+            return self.write_message(data)
         except:
-            logging.error(f"Error sending message to lectern {self.player_number}: {msg}", exc_info=True)
+            log.error("Error sending message to lectern %s", self.player_number, exc_info=True)
 
     def send_initial_state(self):
         if self.player_number is not None and self.controller.game:
-            player = self.controller.get_player_by_number(self.player_number)
-            if player:
-                state = self.controller.get_player_state_dict(player)
-                self.send("PLAYER_STATE", tornado.escape.json_encode(state))
-            else:
-                self.send("NO_PLAYER", "")
+            self.controller.fanout.send_state(self)
 
     def on_message(self, message):
-        pass
+        parsed = tornado.escape.json_decode(message)
+        if parsed["message"] == "RESYNC":
+            self.send_initial_state()
 
     def on_close(self):
         if self.player_number is not None:
             if self.player_number in self.controller.lectern_connections:
                 del self.controller.lectern_connections[self.player_number]
-            logging.info(f"Lectern disconnected for player {self.player_number}")
+            log.info("Lectern disconnected for player %s", self.player_number)
 
 
 class BuzzerController:
@@ -207,9 +269,12 @@ class BuzzerController:
             self
         )  # this is to remove sleep mode on Macbook network card
         self.port = options.port
-        self.connected_players = []
         self.accepting_players = True
         self.lectern_connections = {}
+        self.io_loop = None
+        self.arbiter = BuzzArbiter(self)
+        self.fanout = LecternFanout(self)
+        self.outbound = OutboundQueue(self)
 
     def start(self, threaded=True, tries=0):
         try:
@@ -221,30 +286,61 @@ class BuzzerController:
             self.start(threaded, tries+1)
             return
 
+        self.io_loop = tornado.ioloop.IOLoop.current()
         if threaded:
-            self.thread = Thread(target=tornado.ioloop.IOLoop.current().start)
+            self.thread = Thread(target=self.io_loop.start)
             self.thread.setDaemon(True)
             self.thread.start()
         else:
             tornado.ioloop.IOLoop.current().start()
 
+    @property
+    def registry(self):
+        return self.game.registry
+
     def restart(self):
-        for p in self.connected_players:
-            p.waiter.close()
-        self.connected_players = []
+        for p in self.registry:
+            self.outbound.push(p.waiter, "close")
+        self.registry.clear()
         self.accepting_players = True
 
-    def buzz(self, player):
-        if self.game:
-            i_player = self.game.players.index(player)
-            self.game.buzz_trigger.emit(i_player)
+    def call_soon(self, f, *args):
+        """run f on the IOLoop thread, from any thread"""
+        if self.io_loop is None:  # server not running
+            f(*args)
         else:
-            i_player = self.connected_players.index(player)
-            self.game.buzz_hint_trigger.emit(i_player)
+            self.io_loop.add_callback(f, *args)
+
+    def buzz(self, player, received, stamp):
+        """called on the IOLoop thread with time.monotonic() stamps of when the
+        buzz arrived and when the phone says it was pressed"""
+        self.arbiter.buzz(player, received, stamp)
+
+    def lock(self, winner):
+        """tell the phones who got in, before the GUI hears about it"""
+        for p in self.registry:
+            self.outbound.write_now(p.waiter, "send_frame", "BUZZ_WON" if p is winner else "LOCKED_OUT")
+
+    def unlock(self, exclude=None):
+        """let every phone but `exclude` buzz. `exclude`, the player who just
+        answered, is told it is locked out so it stops showing its win"""
+        for p in self.registry:
+            self.outbound.write_now(p.waiter, "send_frame", "LOCKED_OUT" if p is exclude else "UNLOCK")
+
+    # players are passed to the GUI as themselves, not their index, since the
+    # host may reorder them before the signal is handled
+
+    def buzz_won(self, player, received):
+        if player in self.registry:
+            self.game.buzz_won_trigger.emit(player, received)
+
+    def buzz_hint(self, player):
+        if player in self.registry:
+            self.game.buzz_hint_trigger.emit(player)
 
     def wager(self, player, amount):
-        i_player = self.game.players.index(player)
-        self.game.wager_trigger.emit(i_player, amount)
+        if player in self.registry:
+            self.game.wager_trigger.emit(player, amount)
 
     def answer(self, player, guess):
         if self.game:
@@ -252,7 +348,7 @@ class BuzzerController:
             player.page = "null"
 
     def new_player(self, player):
-        self.connected_players.append(player)
+        self.registry.add(player)
         self.game.new_player_trigger.emit()
 
     @classmethod
@@ -269,33 +365,28 @@ class BuzzerController:
             return f"{localip}:{self.port}"
 
     def player_with_token(self, token):
-        for p in self.connected_players:
-            logging.info(f"{p.token}, {token}")
-            if p.token.hex() == token:
-                logging.info("MATCH")
-                return p
-        return None
+        return self.registry.with_token(token)
 
     def open_wagers(self, players=None):
         if players is None:
-            players = self.connected_players
+            players = self.registry
 
         for p in players:
-            p.waiter.send("PROMPTWAGER", str(max(p.score, 0)))
+            self.outbound.push(p.waiter, "send", "PROMPTWAGER", str(max(p.score, 0)))
             p.page = "wager"
 
     def prompt_answers(self):
-        for p in self.connected_players:
-            p.waiter.send("PROMPTANSWER")
+        for p in self.registry:
+            self.outbound.push(p.waiter, "send", "PROMPTANSWER")
             p.page = "answer"
 
     def toolate(self):
-        for p in self.connected_players:
-            p.waiter.send("TOOLATE")
+        for p in self.registry:
+            self.outbound.push(p.waiter, "send_frame", "TOOLATE")
 
     def get_player_by_number(self, player_number):
-        if self.game and player_number < len(self.game.players):
-            return self.game.players[player_number]
+        if self.game:
+            return self.registry.with_number(player_number)
         return None
 
     def get_player_state_dict(self, player):
@@ -307,11 +398,3 @@ class BuzzerController:
             "buzzed": False,
             "finalanswer": getattr(player, 'finalanswer', None),
         }
-
-    def broadcast_to_lecterns(self, player_number, state_dict):
-        if player_number in self.lectern_connections:
-            lectern = self.lectern_connections[player_number]
-            try:
-                lectern.send("PLAYER_STATE", tornado.escape.json_encode(state_dict))
-            except:
-                logging.error(f"Error broadcasting to lectern {player_number}", exc_info=True)
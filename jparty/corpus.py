@@ -0,0 +1,259 @@
+import sqlite3
+import json
+import time
+import hashlib
+import logging
+from contextlib import closing
+from dataclasses import asdict
+from datetime import datetime
+
+from jparty.gamedata import Question, Board, FinalBoard, GameData
+from jparty.constants import CORPUS_DB, INDEX_RECHECK_DAYS
+from jparty.media import media_mtime
+
+# checked in order, so more specific names come first
+TOURNAMENT_TYPES = [
+    ("Ultimate Tournament of Champions", "ultimate_toc"),
+    ("Tournament of Champions", "toc"),
+    ("College Championship", "college"),
+    ("Teen Tournament", "teen"),
+    ("Teachers Tournament", "teachers"),
+    ("Professors Tournament", "professors"),
+    ("Kids Week", "kids"),
+    ("Celebrity", "celebrity"),
+    ("Masters", "masters"),
+    ("Invitational", "invitational"),
+    ("Second Chance", "second_chance"),
+    ("Champions Wildcard", "wildcard"),
+    ("Battle of the Decades", "decades"),
+    ("Tournament", "tournament"),
+]
+
+
+def content_hash(html):
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def iso_date(date):
+    """j-archive dates look like "January 1, 2001"; returns None if unparseable"""
+    try:
+        return datetime.strptime(str(date).strip(), "%B %d, %Y").date().isoformat()
+    except ValueError:
+        return None
+
+
+def tournament_type(comments):
+    comments = str(comments).lower()
+    for name, kind in TOURNAMENT_TYPES:
+        if name.lower() in comments:
+            return kind
+    return "regular"
+
+
+def question_to_dict(q):
+    d = asdict(q)
+    d["index"] = list(q.index)
+    return d
+
+
+def question_from_dict(d):
+    d = dict(d)
+    d["index"] = tuple(d["index"])
+    return Question(**d)
+
+
+def game_to_dict(data):
+    rounds = []
+    for board in data.rounds:
+        if isinstance(board, FinalBoard):
+            rounds.append(
+                {
+                    "final": True,
+                    "category": str(board.category),
+                    "question": question_to_dict(board.question),
+                }
+            )
+        else:
+            rounds.append(
+                {
+                    "final": False,
+                    "categories": [str(c) for c in board.categories],
+                    "dj": board.dj,
+                    "questions": [question_to_dict(q) for q in board.questions],
+                }
+            )
+    return {"rounds": rounds, "date": str(data.date), "comments": str(data.comments)}
+
+
+def game_from_dict(d):
+    rounds = []
+    for r in d["rounds"]:
+        if r["final"]:
+            rounds.append(FinalBoard(r["category"], question_from_dict(r["question"])))
+        else:
+            questions = [question_from_dict(q) for q in r["questions"]]
+            rounds.append(Board(r["categories"], questions, dj=r["dj"]))
+    return GameData(rounds, d["date"], d["comments"])
+
+
+class CorpusStore(object):
+    """On-disk store of parsed games, keyed by game id and html content hash"""
+
+    def __init__(self, path=CORPUS_DB):
+        self.path = path
+        with closing(self.connect()) as con, con:
+            con.execute(
+                """CREATE TABLE IF NOT EXISTS games (
+                    game_id TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    parser_version INTEGER NOT NULL,
+                    media_mtime INTEGER NOT NULL,
+                    data TEXT NOT NULL
+                )"""
+            )
+            con.execute(
+                """CREATE TABLE IF NOT EXISTS game_index (
+                    game_id TEXT PRIMARY KEY,
+                    complete INTEGER NOT NULL,
+                    rounds INTEGER,
+                    date TEXT,
+                    comments TEXT,
+                    tournament TEXT,
+                    checked REAL NOT NULL
+                )"""
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS game_index_date ON game_index (date)")
+            con.execute(
+                """CREATE TABLE IF NOT EXISTS source_stats (
+                    source TEXT PRIMARY KEY,
+                    wins INTEGER NOT NULL
+                )"""
+            )
+
+    def connect(self):
+        # a fresh connection per call so the store can be used from any thread
+        return sqlite3.connect(str(self.path), timeout=10)
+
+    def load(self, game_id, parser_version):
+        """Return the stored GameData, or None if missing or stale"""
+        with closing(self.connect()) as con:
+            row = con.execute(
+                "SELECT parser_version, media_mtime, data FROM games WHERE game_id = ?",
+                (str(game_id),),
+            ).fetchone()
+        if row is None:
+            return None
+        version, mtime, data = row
+        if version != parser_version or mtime != media_mtime(game_id):
+            logging.info(f"corpus entry for {game_id} is stale")
+            return None
+        return game_from_dict(json.loads(data))
+
+    def is_current(self, game_id, html_hash, parser_version):
+        with closing(self.connect()) as con:
+            row = con.execute(
+                "SELECT content_hash, parser_version, media_mtime FROM games WHERE game_id = ?",
+                (str(game_id),),
+            ).fetchone()
+        return row is not None and row == (
+            html_hash,
+            parser_version,
+            media_mtime(game_id),
+        )
+
+    def save(self, game_id, html_hash, parser_version, data):
+        with closing(self.connect()) as con, con:
+            con.execute(
+                "INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?)",
+                (
+                    str(game_id),
+                    html_hash,
+                    parser_version,
+                    media_mtime(game_id),
+                    json.dumps(game_to_dict(data)),
+                ),
+            )
+            self.__index(con, game_id, data)
+
+    def __index(self, con, game_id, data, date=None, comments=None):
+        if data is None:
+            row = (
+                str(game_id),
+                0,
+                None,
+                iso_date(date) if date is not None else None,
+                str(comments) if comments is not None else None,
+                tournament_type(comments) if comments is not None else None,
+                time.time(),
+            )
+        else:
+            row = (
+                str(game_id),
+                int(data.complete()),
+                sum(1 for b in data.rounds if not isinstance(b, FinalBoard)),
+                iso_date(data.date),
+                str(data.comments),
+                tournament_type(data.comments),
+                time.time(),
+            )
+        con.execute("INSERT OR REPLACE INTO game_index VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+
+    def mark_incomplete(self, game_id, date=None, comments=None):
+        """Record that game_id could not be parsed into a full game, with
+        whatever date and comments its page had (see retrieve.game_metadata)"""
+        with closing(self.connect()) as con, con:
+            self.__index(con, game_id, None, date, comments)
+
+    def known_incomplete(self, game_id):
+        """True if game_id was found incomplete recently enough to not re-fetch it"""
+        with closing(self.connect()) as con:
+            row = con.execute(
+                "SELECT complete, checked FROM game_index WHERE game_id = ?",
+                (str(game_id),),
+            ).fetchone()
+        if row is None:
+            return False
+        complete, checked = row
+        return not complete and time.time() - checked < INDEX_RECHECK_DAYS * 86400
+
+    def query_index(self, start_date=None, end_date=None, tournament=None, complete=True):
+        """Indexed games, optionally filtered by ISO date range (inclusive),
+        tournament type (see TOURNAMENT_TYPES, or "regular") and completeness"""
+        clauses, args = [], []
+        if complete is not None:
+            clauses.append("complete = ?")
+            args.append(int(complete))
+        if start_date is not None:
+            clauses.append("date >= ?")
+            args.append(start_date)
+        if end_date is not None:
+            clauses.append("date <= ?")
+            args.append(end_date)
+        if tournament is not None:
+            clauses.append("tournament = ?")
+            args.append(tournament)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        with closing(self.connect()) as con:
+            con.row_factory = sqlite3.Row
+            rows = con.execute(f"SELECT * FROM game_index{where} ORDER BY date", args)
+            return [dict(r) for r in rows]
+
+    def source_wins(self):
+        """Number of hedged fetches each game source has won, by source name"""
+        with closing(self.connect()) as con:
+            return dict(con.execute("SELECT source, wins FROM source_stats"))
+
+    def record_source_win(self, source):
+        with closing(self.connect()) as con, con:
+            con.execute(
+                """INSERT INTO source_stats VALUES (?, 1)
+                   ON CONFLICT (source) DO UPDATE SET wins = wins + 1""",
+                (source,),
+            )
+
+    def game_ids(self):
+        with closing(self.connect()) as con:
+            return [r[0] for r in con.execute("SELECT game_id FROM games")]
+
+
+corpus = CorpusStore()
@@ -0,0 +1,159 @@
+import json
+import time
+import random
+import logging
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from jparty.retrieve import (
+    get_wayback_game_html,
+    get_jarchive_game_html,
+    process_game_board_from_html,
+    game_metadata,
+    PARSER_VERSION,
+)
+from jparty.corpus import corpus, content_hash
+from jparty.constants import SAVED_GAMES, REPO_ROOT
+
+DOWNLOAD_JOURNAL = REPO_ROOT / "jparty" / "data" / "download_journal.jsonl"
+WAYBACK_HOST = "web.archive.org"
+JARCHIVE_HOST = "j-archive.com"
+
+
+def parse_game_ids(specs):
+    """Expand ids given as "123", "100-200" or "5,7,9" into a sorted list"""
+    game_ids = set()
+    for spec in specs:
+        for part in spec.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if "-" in part:
+                first, last = part.split("-", 1)
+                game_ids.update(range(int(first), int(last) + 1))
+            else:
+                game_ids.add(int(part))
+    return sorted(game_ids)
+
+
+class RateLimiter(object):
+    """Spaces out requests to each host by at least 1/rate seconds"""
+
+    def __init__(self, rates):
+        self.intervals = {host: 1.0 / rate for host, rate in rates.items()}
+        self.__next_slot = {host: 0.0 for host in rates}
+        self.__lock = threading.Lock()
+
+    def wait(self, host):
+        with self.__lock:
+            now = time.monotonic()
+            slot = max(now, self.__next_slot[host])
+            self.__next_slot[host] = slot + self.intervals[host]
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class DownloadJournal(object):
+    """Append-only record of finished ids so interrupted syncs can resume"""
+
+    def __init__(self, path=DOWNLOAD_JOURNAL):
+        self.path = path
+        self.__lock = threading.Lock()
+        self.status = {}
+        if path.exists():
+            with path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # partially written last line
+                    self.status[entry["game_id"]] = entry["status"]
+
+    def done(self, game_id):
+        return self.status.get(game_id) in ("saved", "incomplete", "existing")
+
+    def record(self, game_id, status):
+        with self.__lock:
+            self.status[game_id] = status
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps({"game_id": game_id, "status": status, "time": time.time()}) + "\n")
+
+
+class BulkDownloader(object):
+    def __init__(self, workers=8, wayback_rate=4.0, jarchive_rate=0.5, retries=3, backoff=2.0, journal=None):
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = RateLimiter({WAYBACK_HOST: wayback_rate, JARCHIVE_HOST: jarchive_rate})
+        self.journal = journal if journal is not None else DownloadJournal()
+
+    def fetch(self, game_id):
+        """Fetch and parse a game page, preferring the wayback machine"""
+        try:
+            # one token per request: the CDX lookup and the snapshot fetch
+            game_html = get_wayback_game_html(game_id, wait=partial(self.limiter.wait, WAYBACK_HOST))
+        except Exception as e:
+            logging.info(f"wayback failed for {game_id}: {e}")
+            self.limiter.wait(JARCHIVE_HOST)
+            game_html = get_jarchive_game_html(game_id)
+        # raises on pages that are not j-archive games (e.g. error pages)
+        game_data = process_game_board_from_html(game_html, game_id)
+        return game_html, game_data
+
+    def download(self, game_id):
+        saved_game_path = SAVED_GAMES / f"{game_id}.html"
+        if saved_game_path.exists():
+            return "existing"
+
+        for attempt in range(self.retries + 1):
+            try:
+                game_html, game_data = self.fetch(game_id)
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    logging.error(f"Giving up on {game_id}: {e}")
+                    return "failed"
+                delay = self.backoff * 2**attempt * random.uniform(0.5, 1.5)
+                logging.info(f"Retrying {game_id} in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+        tmp_path = saved_game_path.with_suffix(".part")
+        with tmp_path.open("w+", encoding="utf-8") as f:
+            f.write(game_html)
+        tmp_path.replace(saved_game_path)
+
+        if game_data is None:
+            corpus.mark_incomplete(game_id, *game_metadata(game_html))
+            return "incomplete"
+        corpus.save(game_id, content_hash(game_html), PARSER_VERSION, game_data)
+        return "saved"
+
+    def run(self, game_ids):
+        """Download all game_ids, returning a count of each outcome"""
+        # everything that needs no network is filtered out up front
+        todo = []
+        counts = {}
+        for game_id in game_ids:
+            if self.journal.done(game_id):
+                status = "skipped"
+            elif corpus.known_incomplete(game_id):
+                status = "known incomplete"
+            elif (SAVED_GAMES / f"{game_id}.html").exists():
+                status = "existing"
+                self.journal.record(game_id, status)
+            else:
+                todo.append(game_id)
+                continue
+            counts[status] = counts.get(status, 0) + 1
+
+        print(f"{len(todo)} games to download, {len(game_ids) - len(todo)} already done")
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.download, game_id): game_id for game_id in todo}
+            for i, future in enumerate(as_completed(futures), 1):
+                game_id = futures[future]
+                status = future.result()
+                self.journal.record(game_id, status)
+                counts[status] = counts.get(status, 0) + 1
+                print(f"[{i}/{len(todo)}] {game_id}: {status}")
+        return counts
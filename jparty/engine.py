@@ -0,0 +1,342 @@
+"""The rules of the game, with no display, sound or network.
+
+GameEngine holds the rounds, who may buzz, scores, daily doubles and Final
+Jeopardy, and reports every change as an event to its listeners, which
+subclass EngineListener. The Qt displays are one such listener (see
+game.DisplaySubscriber); anything else, such as a benchmark or a test
+client, can drive the same engine. Events are delivered synchronously on
+the thread that called the engine."""
+
+import os
+import sys
+import logging
+
+from jparty.gamedata import FinalBoard
+
+log = logging.getLogger(__name__)
+
+
+class Player(object):
+    def __init__(self, name, waiter=None, player_number=0):
+        self.name = name
+        self.token = os.urandom(15)
+        # score at index 0 is start of game, 1 after first question
+        self.score_by_question = [0]
+        self.score = 0
+        self.waiter = waiter
+        self.wager = None
+        self.finalanswer = ""
+        self.page = "buzz"
+        self.renumber(player_number)
+
+    def renumber(self, player_number):
+        self.player_number = player_number
+
+    def __hash__(self):
+        return int.from_bytes(self.token, sys.byteorder)
+
+    def state(self):
+        return {"page": self.page, "score": self.score}
+
+    def update_scores(self, question_number, new_score):
+        """update players score"""
+        if (len(self.score_by_question)) == question_number:
+            self.score_by_question.append(new_score)
+        else:
+            for _ in range(question_number - len(self.score_by_question)):
+                self.score_by_question.append(self.score_by_question[-1])
+            self.score_by_question.append(new_score)
+
+
+class EngineListener(object):
+    """Events sent by GameEngine. Override the ones you need."""
+
+    def round_loaded(self, board):
+        pass
+
+    def question_loaded(self, question):
+        """a question other than a daily double was picked"""
+
+    def daily_double(self, question):
+        """a daily double was picked, the host says who found it"""
+
+    def daily_double_wager(self, player, wager):
+        pass
+
+    def responses_opened(self, excluded):
+        """players other than `excluded` may buzz in"""
+
+    def buzz_won(self, player):
+        pass
+
+    def answer_judged(self, player, correct):
+        pass
+
+    def score_changed(self, player):
+        pass
+
+    def stumped(self, question):
+        """time ran out with nobody answering correctly"""
+
+    def question_closed(self, question):
+        pass
+
+    def round_complete(self, board):
+        pass
+
+    def final_started(self, question):
+        pass
+
+    def wager_received(self, player):
+        pass
+
+    def wagers_complete(self):
+        pass
+
+    def final_responses_opened(self):
+        pass
+
+    def final_answer_received(self, player):
+        """may come from the buzzer server's thread"""
+
+    def final_responses_closed(self):
+        pass
+
+    def final_judgement_started(self):
+        pass
+
+    def final_judging(self, player):
+        pass
+
+    def final_judged(self, player, correct):
+        pass
+
+    def game_over(self, winners):
+        pass
+
+    def game_reset(self):
+        pass
+
+
+class GameEngine(object):
+    def __init__(self, players=None):
+        # shared with the player registry, which keeps its order
+        self.players = players if players is not None else []
+        self.listeners = []
+        self.__handlers = {}  # event -> each listener's bound method
+        self.reset(notify=False)
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+        self.__handlers = {}
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+        self.__handlers = {}
+
+    def emit(self, event, *args):
+        handlers = self.__handlers.get(event)
+        if handlers is None:
+            handlers = self.__handlers[event] = [getattr(l, event) for l in self.listeners]
+        for handler in handlers:
+            handler(*args)
+
+    def reset(self, notify=True):
+        self.data = None
+        self.current_round = None
+        self.questions_left = 0  # in current_round
+        self.question_number = 1
+        self.original_players = {}
+        self.active_question = None
+        self.accepting_responses = False
+        self.answering_player = None
+        self.previous_answerer = None
+        self.soliciting_player = False  # part of selecting who found a daily double
+        self.judgement_round = 0
+        self.sorted_players = None
+        if notify:
+            self.emit("game_reset")
+
+    # rounds and questions
+
+    def start(self, data=None):
+        if data is not None:
+            self.data = data
+        self.load_round(self.data.rounds[0])
+
+    def load_round(self, board):
+        self.current_round = board
+        self.questions_left = sum(not q.complete for q in board.questions)
+        self.emit("round_loaded", board)
+
+    def round_index(self):
+        return self.data.rounds.index(self.current_round)
+
+    def select_question(self, q):
+        self.active_question = q
+        if q.dd:
+            log.info("Daily double!")
+            self.soliciting_player = True
+            self.emit("daily_double", q)
+        else:
+            self.emit("question_loaded", q)
+
+    def back_to_board(self):
+        q = self.active_question
+        self.question_number += 1
+        if not q.complete:
+            q.complete = True
+            self.questions_left -= 1
+        self.update_original_player_scores()
+        self.active_question = None
+        self.accepting_responses = False
+        self.previous_answerer = None
+        self.answering_player = None
+        self.emit("question_closed", q)
+        if self.questions_left == 0:
+            log.info("NEXT ROUND")
+            self.emit("round_complete", self.current_round)
+
+    def next_round(self):
+        i = self.round_index()
+        log.info("ROUND %s", i)
+        board = self.data.rounds[i + 1]
+
+        if isinstance(board, FinalBoard):
+            self.current_round = board
+            self.active_question = board.question
+            self.update_original_player_scores()
+            self.emit("final_started", self.active_question)
+        else:
+            self.load_round(board)
+
+    def update_original_player_scores(self):
+        """scores of the players in the televised game, from actual_results"""
+        buzzed_players = []
+        for player, score in self.active_question.actual_results:
+            if player not in self.original_players:
+                self.original_players[player] = [0 for _ in range(self.question_number)]
+            buzzed_players.append(player)
+            self.original_players[player].append(score + self.original_players[player][-1])
+        for player in self.original_players:
+            if player not in buzzed_players:
+                self.original_players[player].append(self.original_players[player][-1])
+
+    # buzzing in and judging
+
+    def open_responses(self):
+        self.accepting_responses = True
+        self.emit("responses_opened", self.previous_answerer)
+
+    def close_responses(self):
+        self.accepting_responses = False
+
+    def buzz(self, player):
+        """Lock in player if they may buzz, returning whether they were"""
+        if (
+            not self.accepting_responses
+            or player is self.previous_answerer
+            or player not in self.players
+        ):
+            return False
+        self.accepting_responses = False
+        self.previous_answerer = player
+        self.answering_player = player
+        self.emit("buzz_won", player)
+        return True
+
+    def time_up(self):
+        self.accepting_responses = False
+        self.emit("stumped", self.active_question)
+
+    def judge(self, correct):
+        """Score the answering player, then either reopen responses or go
+        back to the board"""
+        player = self.answering_player
+        value = self.active_question.value
+        new_score = player.score + value if correct else player.score - value
+        player.update_scores(self.question_number, new_score)
+        self.set_score(player, new_score)
+        self.answering_player = None
+        self.emit("answer_judged", player, correct)
+        if correct or self.active_question.dd:
+            self.back_to_board()
+        else:
+            self.open_responses()
+
+    def set_score(self, player, score):
+        player.score = score
+        self.emit("score_changed", player)
+
+    def adjust_score(self, player, score):
+        """the host overriding a player's score"""
+        self.set_score(player, score)
+        player.score_by_question[-1] = score
+
+    # daily doubles
+
+    def dd_max_wager(self, player):
+        try:
+            round_index = self.round_index()
+        except ValueError:
+            round_index = 1
+        return max(player.score, 1000 if round_index == 0 else 2000)
+
+    def daily_double_wager(self, player, wager):
+        self.soliciting_player = False
+        self.answering_player = player
+        self.active_question.value = wager
+        self.emit("daily_double_wager", player, wager)
+
+    # final jeopardy
+
+    def wager(self, player, amount):
+        if player not in self.players:
+            return
+        player.wager = amount
+        log.info("player %s wagered %s", player.player_number, amount)
+        self.emit("wager_received", player)
+        if all(p.wager is not None for p in self.players):
+            self.emit("wagers_complete")
+
+    def open_final_responses(self):
+        self.accepting_responses = True
+        self.emit("final_responses_opened")
+
+    def final_answer(self, player, guess):
+        player.finalanswer = guess
+        log.info("player %s guessed %s", player.player_number, guess)
+        self.emit("final_answer_received", player)
+
+    def final_time_up(self):
+        self.accepting_responses = False
+        self.emit("final_responses_closed")
+
+    def final_next_player(self):
+        """Move on to judging the next player, lowest score first, or end the game"""
+        if self.judgement_round == 0:
+            self.sorted_players = sorted(self.players, key=lambda x: x.score)
+            self.emit("final_judgement_started")
+
+        elif self.judgement_round == len(self.sorted_players):
+            self.end_game()
+            return
+
+        self.answering_player = self.sorted_players[self.judgement_round]
+        self.emit("final_judging", self.answering_player)
+
+    def final_judge(self, correct):
+        ap = self.answering_player
+        new_score = ap.score + ap.wager if correct else ap.score - ap.wager
+        ap.update_scores(self.question_number, new_score)
+        self.set_score(ap, new_score)
+        self.judgement_round += 1
+        self.emit("final_judged", ap, correct)
+
+    def winners(self):
+        top_score = max([p.score for p in self.players])
+        return [p for p in self.players if p.score == top_score]
+
+    def end_game(self):
+        log.info("Game over!")
+        self.emit("game_over", self.winners())
@@ -0,0 +1,110 @@
+from PyQt6.QtCore import QTimer
+
+import logging
+import tornado.escape
+
+log = logging.getLogger(__name__)
+
+
+class LecternFanout(object):
+    """Batches lectern state updates so each game event sends at most one
+    message per lectern, containing only the fields that changed.
+
+    update() is called on the GUI thread. All the updates made while one game
+    event is handled are collected, then handed to the IOLoop thread in one
+    callback once control returns to the Qt event loop. Each lectern gets a
+    PLAYER_DELTA carrying a version number. A lectern that sees a gap in the
+    versions asks for a full PLAYER_STATE with RESYNC."""
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.__pending = {}  # GUI thread: player number -> latest state
+        self.__pending_updates = 0
+        self.__sent = {}  # IOLoop thread: player number -> last state sent
+        self.__versions = {}
+        self.events = 0
+        self.updates = 0
+        self.messages = 0
+
+    # called on the GUI thread
+
+    def update(self, player_number, state):
+        if not self.__pending:
+            QTimer.singleShot(0, self.__dispatch)
+        self.__pending[player_number] = state
+        self.__pending_updates += 1
+
+    def clear(self):
+        """Forget all state and blank every lectern"""
+        self.controller.call_soon(self._clear)
+
+    def __dispatch(self):
+        batch, self.__pending = self.__pending, {}
+        updates, self.__pending_updates = self.__pending_updates, 0
+        self.controller.call_soon(self._flush, batch, updates)
+
+    # called on the IOLoop thread
+
+    def _flush(self, batch, updates):
+        messages = 0
+        for player_number, state in batch.items():
+            sent = self.__sent.get(player_number)
+            delta = {k: v for k, v in state.items() if sent is None or sent.get(k) != v}
+            if not delta:
+                continue
+            version = self.__versions.get(player_number, 0) + 1
+            self.__versions[player_number] = version
+            self.__sent[player_number] = dict(state)
+
+            lectern = self.controller.lectern_connections.get(player_number)
+            if lectern is not None:
+                self.controller.outbound.write_now(
+                    lectern,
+                    "send_encoded",
+                    tornado.escape.json_encode(
+                        {"message": "PLAYER_DELTA", "version": version, "delta": delta}
+                    ),
+                )
+                messages += 1
+
+        self.events += 1
+        self.updates += updates
+        self.messages += messages
+        log.info("lectern fan-out: %s updates sent as %s messages", updates, messages)
+
+    def _clear(self):
+        self.__sent = {}
+        self.__versions = {}
+        encoded = tornado.escape.json_encode({"message": "NO_PLAYER", "text": ""})
+        for lectern in list(self.controller.lectern_connections.values()):
+            self.controller.outbound.write_now(lectern, "send_encoded", encoded)
+
+    def send_state(self, lectern):
+        """Send a lectern the full state for its player number"""
+        player_number = lectern.player_number
+        state = self.__sent.get(player_number)
+        if state is None:
+            player = self.controller.get_player_by_number(player_number)
+            if player is None:
+                lectern.send("NO_PLAYER", "")
+                return
+            state = self.controller.get_player_state_dict(player)
+            self.__sent[player_number] = state
+            self.__versions[player_number] = self.__versions.get(player_number, 0) + 1
+        lectern.send_encoded(
+            tornado.escape.json_encode(
+                {
+                    "message": "PLAYER_STATE",
+                    "version": self.__versions[player_number],
+                    "state": state,
+                }
+            )
+        )
+
+    def stats(self):
+        return {
+            "events": self.events,
+            "updates": self.updates,
+            "messages": self.messages,
+            "messages_per_event": self.messages / self.events if self.events else 0.0,
+        }
@@ -0,0 +1,35 @@
+"""Compact binary websocket frames for the latency-critical buzzer messages.
+
+Each frame is a one byte message code followed by fixed little-endian
+fields. Every other message stays JSON ({"message": ..., "text": ...})."""
+
+import struct
+
+# message: (code, struct format of the fields after the code)
+FORMATS = {
+    "BUZZ": (1, "<d"),  # phone's performance.now() in ms
+    "BUZZ_WON": (2, ""),
+    "LOCKED_OUT": (3, ""),
+    "UNLOCK": (4, ""),
+    "TOOLATE": (5, ""),
+    "PING": (6, "<d"),  # server time.monotonic() in s
+    "PONG": (7, "<dd"),  # the PING's server time, phone's performance.now() in ms
+}
+BINARY_MESSAGES = frozenset(FORMATS)
+
+_encoders = {msg: (bytes([code]), struct.Struct(fmt)) for msg, (code, fmt) in FORMATS.items()}
+_decoders = {code: (msg, struct.Struct(fmt)) for msg, (code, fmt) in FORMATS.items()}
+
+
+def encode(msg, *fields):
+    code, fmt = _encoders[msg]
+    return code + fmt.pack(*fields)
+
+
+def decode(frame):
+    """Return (message, fields) for a binary frame, raising ValueError if malformed"""
+    try:
+        msg, fmt = _decoders[frame[0]]
+        return msg, fmt.unpack_from(frame, 1)
+    except (IndexError, KeyError, struct.error) as e:
+        raise ValueError(f"bad frame {bytes(frame)!r}") from e
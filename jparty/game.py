@@ -1,12 +1,11 @@
-from PyQt6.QtCore import Qt, QObject, pyqtSignal
+from PyQt6.QtCore import Qt, QObject, QTimer, pyqtSignal
 from PyQt6.QtWidgets import QInputDialog, QApplication
 
 
-import threading
 import time
+import math
 from dataclasses import dataclass
 import os
-import sys
 import simpleaudio as sa
 from collections.abc import Iterable
 import logging
@@ -15,9 +14,14 @@ matplotlib.use('Agg')  # Use non-interactive backend
 import matplotlib.pyplot as plt
 
 from jparty.utils import SongPlayer, resource_path, CompoundObject
-from jparty.constants import FJTIME, QUESTIONTIME, REPO_ROOT, EARLY_BUZZ_PENALTY
+from jparty.wikimedia import wikimedia
+from jparty.constants import FJTIME, QUESTIONTIME, REPO_ROOT
+from jparty.registry import PlayerRegistry
+from jparty.engine import GameEngine, EngineListener, Player as EnginePlayer
 
 
+log = logging.getLogger(__name__)
+
 MAX_PLAYERS = 6
 index_to_key = {
     0: Qt.Key.Key_Q,
@@ -28,41 +32,74 @@ index_to_key = {
     5: Qt.Key.Key_Y,
 }
 
-class QuestionTimer(object):
-    def __init__(self, interval, f, *args, **kwargs):
+class QuestionTimer(QObject):
+    """Calls f(*args, **kwargs) once it has been running for `interval` seconds.
+    Runs on the event loop of the thread that creates it, so f is called on the
+    GUI thread, and measures time with a monotonic clock."""
+
+    def __init__(self, interval, f, *args, clock=time.monotonic, **kwargs):
         super().__init__()
         self.f = f
         self.args = args
         self.kwargs = kwargs
         self.interval = interval
-        self.__thread = None
-        self.__start_time = None
-        self.__elapsed_time = 0
-
-    def run(self, i):
-        thread = self.__thread
-        time.sleep(i)
-        if thread == self.__thread:
-            self.f(*self.args, **self.kwargs)
+        self.clock = clock
+        self.__start_time = None  # None while paused
+        self.__elapsed_time = 0.0
+        self.__done = False
+        self.__timer = QTimer(self)
+        self.__timer.setSingleShot(True)
+        self.__timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.__timer.timeout.connect(self.__timeout)
+
+    @property
+    def running(self):
+        return self.__start_time is not None
+
+    def elapsed(self):
+        elapsed = self.__elapsed_time
+        if self.running:
+            elapsed += self.clock() - self.__start_time
+        return elapsed
+
+    def remaining(self):
+        """seconds left before f is called, e.g. for countdown lights"""
+        return max(self.interval - self.elapsed(), 0.0)
 
     def start(self):
         """wrapper for resume"""
         self.resume()
 
     def cancel(self):
-        """wrapper for pause"""
+        """stop for good, f will not be called"""
         self.pause()
+        self.__done = True
 
     def pause(self):
-        self.__thread = None
-        self.__elapsed_time += time.time() - self.__start_time
+        if not self.running:
+            return
+        self.__timer.stop()
+        self.__elapsed_time += self.clock() - self.__start_time
+        self.__start_time = None
 
     def resume(self):
-        self.__thread = threading.Thread(
-            target=self.run, args=(self.interval - self.__elapsed_time,)
-        )
-        self.__thread.start()
-        self.__start_time = time.time()
+        if self.running or self.__done:
+            return
+        self.__start_time = self.clock()
+        self.__arm()
+
+    def __arm(self):
+        self.__timer.start(math.ceil(self.remaining() * 1000))
+
+    def __timeout(self):
+        if not self.running:
+            return
+        if self.remaining() * 1000 >= 1:  # woke up early
+            self.__arm()
+            return
+        self.pause()
+        self.__done = True
+        self.f(*self.args, **self.kwargs)
 
 
 @dataclass
@@ -92,7 +129,7 @@ class KeystrokeManager(object):
         events_to_call = []
         for ident, event in self.__events.items():
             if event.active and event.key == key:
-                logging.info(f"Calling {ident}")
+                log.info("Calling %s", ident)
                 events_to_call.append(event)
                 if not event.persistent:
                     self._deactivate(ident)
@@ -104,7 +141,7 @@ class KeystrokeManager(object):
                 event.func()
 
     def _activate(self, ident):
-        logging.info(f"Activating {ident}")
+        log.info("Activating %s", ident)
         e = self.__events[ident]
         e.active = True
         e.hint_setter(True)
@@ -132,66 +169,12 @@ class KeystrokeManager(object):
             self._deactivate(idents)
 
 
-@dataclass
-class Question:
-    index: tuple
-    text: str
-    answer: str
-    category: str
-    value: int = -1
-    dd: bool = False
-    complete: bool = False
-    image: bool = False
-    image_url: str = None
-    actual_results: str = None
-
-
-class Board(object):
-    size = (6, 5)
-
-    def __init__(self, categories, questions, dj=False):
-        self.categories = categories
-        self.dj = dj
-        if not questions is None:
-            self.questions = questions
-        else:
-            self.questions = []
-
-    def get_question(self, i, j):
-        for q in self.questions:
-            if q.index == (i, j):
-                return q
-        return None
-
-    def complete(self):
-        return len(self.questions) == 30
-
-
-class FinalBoard(Board):
-    size = (1, 1)
-
-    def __init__(self, category, question):
-        super().__init__([category], [question], dj=False)
-        self.category = category
-        self.question = question
-
-    def complete(self):
-        return len(self.questions) == 1
-
-
-@dataclass
-class GameData:
-    rounds: list
-    date: str
-    comments: str
-
-
 class Game(QObject):
-    buzz_trigger = pyqtSignal(int)
+    buzz_won_trigger = pyqtSignal(object, float)
+    buzz_hint_trigger = pyqtSignal(object)
     new_player_trigger = pyqtSignal()
-    wager_trigger = pyqtSignal(int, int)
+    wager_trigger = pyqtSignal(object, int)
     toolate_trigger = pyqtSignal()
-    lectern_update_trigger = pyqtSignal(int, dict)
 
     def __init__(self):
         super().__init__()
@@ -199,26 +182,15 @@ class Game(QObject):
         self.host_display = None
         self.main_display = None
         self.dc = None
-        self.question_number = 1
-        self.data = None
 
-        self.current_round = None
-        self.players = []
-        self.original_players = {}
+        self.registry = PlayerRegistry()
+        self.players = self.registry.players
+        self.engine = GameEngine(self.players)
+        self.engine.subscribe(DisplaySubscriber(self))
 
-        self.active_question = None
-        self.accepting_responses = False
-        self.answering_player = None
-        self.previous_answerer = None
         self.timer = None
-        self.soliciting_player = False  # part of selecting who found a daily double
-        
-        self.early_buzzes = set()
-        self.responses_open_time = None
 
         self.song_player = SongPlayer()
-        self.__judgement_round = 0
-        self.__sorted_players = None
 
         self.buzzer_controller = None
 
@@ -289,23 +261,54 @@ class Game(QObject):
                 func_args=player_index
             )
         self.wager_trigger.connect(self.wager)
-        self.buzz_trigger.connect(self.buzz)
+        self.buzz_won_trigger.connect(self.buzz_won)
+        self.buzz_hint_trigger.connect(self.buzz_hint)
         self.new_player_trigger.connect(self.new_player)
         self.toolate_trigger.connect(self.__toolate)
-        self.lectern_update_trigger.connect(self.__broadcast_lectern_update)
+
+    # the state of play is kept by the engine
+
+    @property
+    def data(self):
+        return self.engine.data
+
+    @data.setter
+    def data(self, data):
+        self.engine.data = data
+
+    @property
+    def current_round(self):
+        return self.engine.current_round
+
+    @property
+    def active_question(self):
+        return self.engine.active_question
+
+    @property
+    def accepting_responses(self):
+        return self.engine.accepting_responses
+
+    @property
+    def answering_player(self):
+        return self.engine.answering_player
+
+    @property
+    def soliciting_player(self):
+        return self.engine.soliciting_player
 
     def startable(self):
-        return self.valid_game() and len(self.buzzer_controller.connected_players) > 0
+        return self.valid_game() and len(self.registry) > 0
 
     def begin(self):
         self.song_player.play(repeat=True)
 
     def start_game(self):
-        self.current_round = self.data.rounds[0]
+        wikimedia.prefetch_game(self.data)
+        self.dc.scoreboard.refresh_players()  # lay out any joins still being collected
         self.dc.hide_welcome_widgets()
-        self.dc.board_widget.load_round(self.current_round)
         self.buzzer_controller.accepting_players = False
         self.song_player.stop()
+        self.engine.start()
 
     def setDisplays(self, host_display, main_display):
         self.host_display = host_display
@@ -322,48 +325,30 @@ class Game(QObject):
         self.host_display.borders.spacehints(val)
 
     def new_player(self):
-        self.players = self.buzzer_controller.connected_players
-        self._update_player_numbers()
-        self.dc.scoreboard.refresh_players()
+        self.dc.scoreboard.player_joined()
         self.host_display.welcome_widget.check_start()
         for player in self.players:
             self._update_lectern_for_player(player)
 
     def remove_player(self, player):
-        self.players.remove(player)
-        player.waiter.close()
-        self._update_player_numbers()
-        self.dc.scoreboard.refresh_players()
+        if not self.registry.remove(player):
+            return
+        self.buzzer_controller.outbound.push(player.waiter, "close")
+        self.dc.scoreboard.remove_player(player)
         self.host_display.welcome_widget.check_start()
         for player in self.players:
             self._update_lectern_for_player(player)
 
     def move_player_up(self, player):
-        if player not in self.players:
-            return
-        index = self.players.index(player)
-        if index > 0:
-            self.players[index], self.players[index - 1] = self.players[index - 1], self.players[index]
-            self._update_player_numbers()
-            self.dc.scoreboard.refresh_players()
+        if self.registry.move(player, -1):
+            self.dc.scoreboard.move_player(player)
             self._update_all_lecterns()
 
     def move_player_down(self, player):
-        if player not in self.players:
-            return
-        index = self.players.index(player)
-        if index < len(self.players) - 1:
-            self.players[index], self.players[index + 1] = self.players[index + 1], self.players[index]
-            self._update_player_numbers()
-            self.dc.scoreboard.refresh_players()
+        if self.registry.move(player, 1):
+            self.dc.scoreboard.move_player(player)
             self._update_all_lecterns()
 
-    def _update_player_numbers(self):
-        """Update player_number and key for all players based on their position in the list."""
-        for i, player in enumerate(self.players):
-            player.player_number = i
-            player.key = index_to_key[i]
-
     def _update_all_lecterns(self):
         """Update all connected lecterns to show the correct player for their position."""
         if self.buzzer_controller:
@@ -371,21 +356,15 @@ class Game(QObject):
                 self._update_lectern_for_player(player, buzzed=False)
 
     def valid_game(self):
-        return self.data is not None and all(b.complete() for b in self.data.rounds)
+        return self.data is not None and self.data.complete()
 
     def open_responses(self):
-        self.responses_open_time = time.time()
-        self.dc.borders.lights(True)
-        self.accepting_responses = True
-
-        if not self.timer:
-            self.timer = QuestionTimer(QUESTIONTIME, self.stumped)
-
-        self.timer.start()
+        self.engine.open_responses()
 
     def close_responses(self):
         self.timer.pause()
-        self.accepting_responses = False
+        self.engine.close_responses()
+        self.buzzer_controller.arbiter.close()
         self.dc.borders.lights(True)
 
     def keyboard_buzz(self):
@@ -393,155 +372,66 @@ class Game(QObject):
 
 
     def buzz(self, i_player):
-        player = self.players[i_player]
-        if self.accepting_responses and player is not self.previous_answerer:
-            # Check if player is in penalty period for early buzz
-            if i_player in self.early_buzzes and self.responses_open_time is not None:
-                elapsed = time.time() - self.responses_open_time
-                if elapsed < EARLY_BUZZ_PENALTY:
-                    logging.info(f"Early buzz penalty: player {i_player} ignored (elapsed: {elapsed:.3f}s)")
-                    return
-                else:
-                    # Penalty period expired, remove from early buzzes
-                    self.early_buzzes.discard(i_player)
-            
-            logging.info(f"buzz ({time.time():.6f} s)")
-            self.accepting_responses = False
-            self.timer.pause()
-            self.previous_answerer = player
-            self.dc.player_widget(player).run_lights()
-
-            self.answering_player = player
-            self.keystroke_manager.activate("CORRECT_ANSWER", "INCORRECT_ANSWER")
-            self.dc.borders.lights(False)
-            self._update_lectern_for_player(player, buzzed=True)
-        elif self.active_question is None:
+        """keyboard buzz, decided by the buzzer controller like a phone buzz"""
+        player = self.registry.with_number(i_player)
+        if player is not None:
+            self.buzzer_controller.arbiter.submit(player)
+
+    def buzz_won(self, player, received):
+        """the arbiter has locked in this player, `received` is when the buzz arrived"""
+        controller = self.buzzer_controller
+        if not self.accepting_responses:
+            # e.g. the timer ran out while the buzz was on its way to the GUI.
+            # The phone was told it won, so tell it the question is over
+            log.info("buzz from player %s arrived after responses closed", player.player_number)
+            controller.call_soon(controller.lock, None)
+            return
+        arbiter = controller.arbiter
+        arbiter.gui_latency.add(time.monotonic() - received)
+        log.info(
+            "buzz: locked in %.1f ms, reached GUI in %.1f ms",
+            1000 * arbiter.lock_latency.samples[-1],
+            1000 * arbiter.gui_latency.samples[-1],
+        )
+        if not self.engine.buzz(player):
+            # the host removed them while the buzz was on its way; the arbiter
+            # stopped taking buzzes when it locked them in, so reopen
+            log.info("buzz from player %s dropped, reopening responses", player.player_number)
+            arbiter.open(self.engine.previous_answerer)
+
+    def buzz_hint(self, player):
+        if player in self.registry:
             self.dc.player_widget(player).buzz_hint()
-        else:
-            # Track early buzz (after load_question but before open_responses)
-            if self.active_question is not None and not self.accepting_responses:
-                self.early_buzzes.add(i_player)
-                logging.info(f"Early buzz recorded: player {i_player}")
-
-    def answer_given(self):
-        self.keystroke_manager.deactivate("CORRECT_ANSWER", "INCORRECT_ANSWER")
-        self.dc.player_widget(self.answering_player).stop_lights()
-        answering_player = self.answering_player
-        self.answering_player = None
-        if answering_player:
-            self._update_lectern_for_player(answering_player, buzzed=False)
-
-    def update_original_player_scores(self):
-        buzzed_players = []
-        for player, score in self.active_question.actual_results:
-            if player not in self.original_players:
-                self.original_players[player] = [0 for _ in range(self.question_number)]
-            buzzed_players.append(player)
-            self.original_players[player].append(score + self.original_players[player][-1])
-        for player in self.original_players:
-            if player not in buzzed_players:
-                self.original_players[player].append(self.original_players[player][-1])
 
     def back_to_board(self):
-        logging.info("back_to_board")
-        self.question_number += 1
-        self.dc.hide_question()
-        self.timer = None
-        self.active_question.complete = True
-        self.update_original_player_scores()
-        self.active_question = None
-        self.previous_answerer = None
-        self.early_buzzes = set()
-        self.responses_open_time = None
-        # Clear active state for all players on lecterns
-        if self.answering_player:
-            self._update_lectern_for_player(self.answering_player, buzzed=False)
-        self.answering_player = None
-        # Update all players to ensure lecterns show correct state
-        for player in self.players:
-            self._update_lectern_for_player(player, buzzed=False)
-        if all(q.complete for q in self.current_round.questions):
-            logging.info("NEXT ROUND")
-            self.keystroke_manager.activate("NEXT_ROUND")
+        log.info("back_to_board")
+        self.engine.back_to_board()
 
     def accept_image(self):
-        logging.info("Proposed question image accepted")
+        log.info("Proposed question image accepted")
         self.load_question(self.active_question)
 
     def no_image_needed(self):
-        logging.info("No image needed for question")
+        log.info("No image needed for question")
         self.active_question.image = False
         self.active_question.image_url = None
         self.load_question(self.active_question)
 
     def next_round(self):
-        logging.info("next round")
-        i = self.data.rounds.index(self.current_round)
-        logging.info(f"ROUND {i}")
-        self.current_round = self.data.rounds[i + 1]
-
-        if isinstance(self.current_round, FinalBoard):
-            self.dc.load_final(self.current_round.question)
-            self.active_question = self.current_round.question
-            self.update_original_player_scores()
-            self.start_final()
-        else:
-            self.dc.board_widget.load_round(self.current_round)
+        log.info("next round")
+        self.engine.next_round()
 
-    def start_final(self):
-        logging.info("start final")
-        for player in self.players:
-            self.dc.player_widget(player).set_lights(True)
-
-        self.buzzer_controller.open_wagers()
-
-    def wager(self, i_player, amount):
-        player = self.players[i_player]
-        player.wager = amount
-        self.dc.player_widget(player).set_lights(False)
-        logging.info(f"{player} wagered {amount}")
-        if all(p.wager is not None for p in self.players):
-            self.host_display.question_widget.hint_label.setText(
-                "Press space to show clue!"
-            )
-            self.keystroke_manager.activate("OPEN_FINAL")
+    def wager(self, player, amount):
+        self.engine.wager(player, amount)
 
     def answer(self, player, guess):
-        player.finalanswer = guess
-        logging.info(f"{player} guessed {guess}")
+        self.engine.final_answer(player, guess)
 
     def final_open_responses(self):
-        self.dc.borders.lights(True)
-        self.buzzer_controller.prompt_answers()
-
-        self.song_player.final()
-
-        self.timer = QuestionTimer(FJTIME, self.final_finished_song)
-        self.timer.start()
+        self.engine.open_final_responses()
 
     def final_next_player(self):
-        for p in self.players:
-            self.dc.player_widget(p).set_lights(False)
-
-        if self.__judgement_round == 0:
-            self.dc.load_final_judgement()
-            self.__sorted_players = sorted(self.players, key=lambda x: x.score)
-
-        elif self.__judgement_round == len(self.players):
-            self.end_game()
-            return
-
-        self.answering_player = self.__sorted_players[self.__judgement_round]
-
-        self.dc.player_widget(self.answering_player).set_lights(True)
-
-        self.dc.final_window.guess_label.setText("")
-        self.dc.final_window.wager_label.setText("")
-        
-        # Update lectern to show player name (answer will be shown in final_show_answer)
-        self._update_lectern_for_player(self.answering_player, show_final_answer=False)
-
-        self.keystroke_manager.activate("FINAL_SHOW_ANSWER")
+        self.engine.final_next_player()
 
     def final_show_answer(self):
         answer = self.answering_player.finalanswer
@@ -556,48 +446,14 @@ class Game(QObject):
         )
 
     def final_correct_answer(self):
-        ap = self.answering_player
-        new_score = ap.score + ap.wager
-        ap.update_scores(self.question_number, new_score)
-        self.set_score(ap, ap.score + ap.wager)
-        self.final_judgement_given()
+        self.engine.final_judge(True)
 
     def final_incorrect_answer(self):
-        ap = self.answering_player
-        new_score = ap.score - ap.wager
-        ap.update_scores(self.question_number, new_score)
-        self.set_score(ap, new_score)
-        self.final_judgement_given()
-
-    def final_judgement_given(self):
-        self.keystroke_manager.deactivate(
-            "FINAL_CORRECT_ANSWER", "FINAL_INCORRECT_ANSWER"
-        )
-        self.dc.final_window.wager_label.setText(str(self.answering_player.wager))
-        self.keystroke_manager.activate("FINAL_NEXT_PLAYER")
-        self.__judgement_round += 1
+        self.engine.final_judge(False)
 
     def final_finished_song(self):
-        logging.info("Final song ended")
-        self.toolate_trigger.emit()
-        self.accepting_responses = False
-        self.dc.borders.flash()
-        self.keystroke_manager.activate("FINAL_NEXT_PLAYER")
-
-    def end_game(self):
-        top_score = max([p.score for p in self.players])
-        winners = [p for p in self.players if p.score == top_score]
-        for w in winners:
-            self.dc.player_widget(w).set_lights(True)
-
-        if len(winners) == 1:
-            self.dc.final_window.show_winner(winners[0])
-        else:
-            self.dc.final_window.show_tie()
-
-        # self.generate_final_score_graph()
-        logging.info("Game over!")
-        self.keystroke_manager.activate("GENERATE_GRAPHS")
+        log.info("Final song ended")
+        self.engine.final_time_up()
 
     def generate_final_score_graphs(self):
         self.keystroke_manager.deactivate("GENERATE_GRAPHS")
@@ -615,11 +471,11 @@ class Game(QObject):
         """create an image of score by question number"""
         current_player_data = {player.player_number : player.score_by_question for player in self.players}
         if players == "original":
-            data = self.original_players
+            data = self.engine.original_players
         elif players == "current":
             data = current_player_data
         elif players == "all":
-            data = current_player_data | self.original_players
+            data = current_player_data | self.engine.original_players
         
         game_id = os.environ["JPARTY_GAME_ID"]
         
@@ -661,40 +517,15 @@ class Game(QObject):
     def close_game(self):
         self.buzzer_controller.restart()
         # Notify all lecterns that players are cleared
-        if self.buzzer_controller:
-            for player_number in list(self.buzzer_controller.lectern_connections.keys()):
-                if player_number in self.buzzer_controller.lectern_connections:
-                    try:
-                        self.buzzer_controller.lectern_connections[player_number].send("NO_PLAYER", "")
-                    except:
-                        pass
-        self.players = []
-        self.original_players = {}
-        self.question_number = 1
-        self.active_question = None
-        self.current_round = None
-        self.answering_player = None
+        self.buzzer_controller.fanout.clear()
         self.timer = None
-        self.data = None
-        self.__judgement_round = 0
-        self.early_buzzes = set()
-        self.responses_open_time = None
+        self.engine.reset()
+        self.buzzer_controller.arbiter.reset()
         self.dc.restart()
         self.begin()
 
     def get_dd_wager(self, player):
-        self.answering_player = player
-        self.soliciting_player = False
-        try:
-            logging.info(f"Current round is: {self.current_round}")
-            logging.info(f"Rounds are {self.data.rounds}")
-            round_index = self.data.rounds.index(self.current_round)
-        except:
-            round_index = 1
-
-        max_wager = max(
-            self.answering_player.score,
-            1000 if round_index == 0 else 2000)
+        max_wager = self.engine.dd_max_wager(player)
         wager_res = QInputDialog.getInt(
             self.host_display,
             "Wager",
@@ -703,77 +534,31 @@ class Game(QObject):
             max=max_wager,
         )
         if not wager_res[1]:
-            self.soliciting_player = True
             return False
 
-        wager = wager_res[0]
-        self.active_question.value = wager
-
-        self.keystroke_manager.activate("CORRECT_ANSWER", "INCORRECT_ANSWER")
-        self.dc.question_widget.show_question()
+        self.engine.daily_double_wager(player, wager_res[0])
 
     def load_image_review_screen(self, q):
-        self.active_question = q
+        self.engine.active_question = q
         self.host_display.load_image_review_screen(q)
 
 
     def load_question(self, q):
-        self.active_question = q
-        if q.dd:
-            logging.info("Daily double!")
-            wo = sa.WaveObject.from_wave_file(resource_path("dd.wav"))
-            wo.play()
-            self.soliciting_player = True
-        else:
-            self.keystroke_manager.activate("OPEN_RESPONSES")
-        self.dc.load_question(q)
-        self.dc.remove_card(q)
+        self.engine.select_question(q)
 
     def open_final(self):
         self.dc.question_widget.show_question()
         self.keystroke_manager.activate("FINAL_OPEN_RESPONSES")
 
     def correct_answer(self):
-        new_score = self.answering_player.score + self.active_question.value
-        self.answering_player.update_scores(self.question_number, new_score) 
-        if self.timer:
-            self.timer.cancel()
-
-        self.set_score(
-            self.answering_player,
-            new_score,
-        )
-        self.dc.borders.lights(False)
-        self.answer_given()
-        self.back_to_board()
+        self.engine.judge(True)
 
     def incorrect_answer(self):
-        new_score = self.answering_player.score - self.active_question.value
-        self.answering_player.update_scores(self.question_number, new_score) 
-        self.set_score(
-            self.answering_player,
-            new_score,
-        )
-        self.answer_given()
-        if self.active_question.dd:
-            self.back_to_board()
-        else:
-            self.open_responses()
-            self.timer.resume()
-
-    def stumped(self):
-        self.accepting_responses = False
-        sa.WaveObject.from_wave_file(resource_path("stumped.wav")).play()
-        self.dc.borders.flash()
-        self.keystroke_manager.activate("BACK_TO_BOARD")
+        self.engine.judge(False)
 
     def __toolate(self):
         self.buzzer_controller.toolate()
 
-    def __broadcast_lectern_update(self, player_number, state_dict):
-        if self.buzzer_controller:
-            self.buzzer_controller.broadcast_to_lecterns(player_number, state_dict)
-
     def _update_lectern_for_player(self, player, buzzed=False, show_final_answer=False):
         if self.buzzer_controller:
             state_dict = self.buzzer_controller.get_player_state_dict(player)
@@ -782,12 +567,10 @@ class Game(QObject):
             # Only include finalanswer if we're showing it
             if not show_final_answer:
                 state_dict["finalanswer"] = None
-            self.lectern_update_trigger.emit(player.player_number, state_dict)
+            self.buzzer_controller.fanout.update(player.player_number, state_dict)
 
     def set_score(self, player, score):
-        player.score = score
-        self.dc.player_widget(player).update_score()
-        self._update_lectern_for_player(player)
+        self.engine.set_score(player, score)
 
     def adjust_score(self, player):
         new_score, answered = QInputDialog.getInt(
@@ -797,40 +580,166 @@ class Game(QObject):
             value=player.score,
         )
         if answered:
-            self.set_score(player, new_score)
-        player.score_by_question[-1] = new_score
+            self.engine.adjust_score(player, new_score)
 
     def close(self):
         self.song_player.stop()
         QApplication.quit()
 
 
-class Player(object):
-    def __init__(self, name, waiter, player_number):
-        self.name = name
-        self.token = os.urandom(15)
-        # score at index 0 is start of game, 1 after first question
-        self.score_by_question = [0]
-        self.score = 0
-        self.waiter = waiter
-        self.wager = None
-        self.finalanswer = ""
-        self.page = "buzz"
-        self.player_number = player_number
-        self.key = index_to_key[player_number]
+class DisplaySubscriber(EngineListener):
+    """Plays the engine's events out on the displays, keyboard hints, sounds,
+    buzzers and lecterns"""
+
+    def __init__(self, game):
+        self.game = game
+
+    def all_lights(self, val):
+        for player in self.game.players:
+            self.game.dc.player_widget(player).set_lights(val)
+
+    def round_loaded(self, board):
+        self.game.dc.board_widget.load_round(board)
+
+    def question_loaded(self, q):
+        self.game.buzzer_controller.arbiter.question()
+        self.game.keystroke_manager.activate("OPEN_RESPONSES")
+        self.game.dc.load_question(q)
+        self.game.dc.remove_card(q)
+
+    def daily_double(self, q):
+        self.game.buzzer_controller.arbiter.question()
+        sa.WaveObject.from_wave_file(resource_path("dd.wav")).play()
+        self.game.dc.load_question(q)
+        self.game.dc.remove_card(q)
+
+    def daily_double_wager(self, player, wager):
+        self.game.keystroke_manager.activate("CORRECT_ANSWER", "INCORRECT_ANSWER")
+        self.game.dc.question_widget.show_question()
+
+    def responses_opened(self, excluded):
+        game = self.game
+        game.dc.borders.lights(True)
+        game.buzzer_controller.arbiter.open(excluded=excluded)
+
+        if not game.timer:
+            game.timer = QuestionTimer(QUESTIONTIME, game.engine.time_up)
+
+        game.timer.start()
+
+    def buzz_won(self, player):
+        game = self.game
+        game.timer.pause()
+        game.dc.player_widget(player).run_lights()
+        game.keystroke_manager.activate("CORRECT_ANSWER", "INCORRECT_ANSWER")
+        game.dc.borders.lights(False)
+        game._update_lectern_for_player(player, buzzed=True)
+
+    def answer_judged(self, player, correct):
+        game = self.game
+        if correct:
+            if game.timer:
+                game.timer.cancel()
+            game.dc.borders.lights(False)
+        game.keystroke_manager.deactivate("CORRECT_ANSWER", "INCORRECT_ANSWER")
+        game.dc.player_widget(player).stop_lights()
+        game._update_lectern_for_player(player, buzzed=False)
+
+    def score_changed(self, player):
+        self.game.dc.player_widget(player).update_score()
+        self.game._update_lectern_for_player(player)
+
+    def stumped(self, q):
+        self.game.buzzer_controller.arbiter.close()
+        sa.WaveObject.from_wave_file(resource_path("stumped.wav")).play()
+        self.game.dc.borders.flash()
+        self.game.keystroke_manager.activate("BACK_TO_BOARD")
+
+    def question_closed(self, q):
+        game = self.game
+        game.dc.hide_question()
+        game.timer = None
+        game.buzzer_controller.arbiter.reset()
+        # clear active and buzzed state on every lectern
+        for player in game.players:
+            game._update_lectern_for_player(player, buzzed=False)
+
+    def round_complete(self, board):
+        self.game.keystroke_manager.activate("NEXT_ROUND")
+
+    def final_started(self, q):
+        log.info("start final")
+        # buzzes during the final are early buzzes, as during any question,
+        # not idle practice hints
+        self.game.buzzer_controller.arbiter.question()
+        self.game.dc.load_final(q)
+        self.all_lights(True)
+        self.game.buzzer_controller.open_wagers()
+
+    def wager_received(self, player):
+        self.game.dc.player_widget(player).set_lights(False)
+
+    def wagers_complete(self):
+        self.game.host_display.question_widget.hint_label.setText(
+            "Press space to show clue!"
+        )
+        self.game.keystroke_manager.activate("OPEN_FINAL")
+
+    def final_responses_opened(self):
+        game = self.game
+        game.dc.borders.lights(True)
+        game.buzzer_controller.prompt_answers()
+
+        game.song_player.final()
+
+        game.timer = QuestionTimer(FJTIME, game.final_finished_song)
+        game.timer.start()
+
+    def final_responses_closed(self):
+        self.game.toolate_trigger.emit()
+        self.game.dc.borders.flash()
+        self.game.keystroke_manager.activate("FINAL_NEXT_PLAYER")
+
+    def final_judgement_started(self):
+        self.game.dc.load_final_judgement()
+
+    def final_judging(self, player):
+        game = self.game
+        self.all_lights(False)
+        game.dc.player_widget(player).set_lights(True)
 
-    def __hash__(self):
-        return int.from_bytes(self.token, sys.byteorder)
+        game.dc.final_window.guess_label.setText("")
+        game.dc.final_window.wager_label.setText("")
 
-    def state(self):
-        return {"page": self.page, "score": self.score}
-    
-    def update_scores(self, question_number, new_score):
-        """update players score"""
-        if (len(self.score_by_question)) == question_number:
-            self.score_by_question.append(new_score)
+        # Update lectern to show player name (answer will be shown in final_show_answer)
+        game._update_lectern_for_player(player, show_final_answer=False)
+
+        game.keystroke_manager.activate("FINAL_SHOW_ANSWER")
+
+    def final_judged(self, player, correct):
+        game = self.game
+        game.keystroke_manager.deactivate(
+            "FINAL_CORRECT_ANSWER", "FINAL_INCORRECT_ANSWER"
+        )
+        game.dc.final_window.wager_label.setText(str(player.wager))
+        game.keystroke_manager.activate("FINAL_NEXT_PLAYER")
+
+    def game_over(self, winners):
+        game = self.game
+        self.all_lights(False)
+        for w in winners:
+            game.dc.player_widget(w).set_lights(True)
+
+        if len(winners) == 1:
+            game.dc.final_window.show_winner(winners[0])
         else:
-            for _ in range(question_number - len(self.score_by_question)):
-                self.score_by_question.append(self.score_by_question[-1])
-            self.score_by_question.append(new_score)
+            game.dc.final_window.show_tie()
+
+        # self.generate_final_score_graph()
+        game.keystroke_manager.activate("GENERATE_GRAPHS")
+
 
+class Player(EnginePlayer):
+    def renumber(self, player_number):
+        super().renumber(player_number)
+        self.key = index_to_key[player_number]
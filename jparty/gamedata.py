@@ -0,0 +1,60 @@
+"""Parsed games, kept free of Qt so they can be loaded and stored headless"""
+
+from dataclasses import dataclass
+
+
+@dataclass
+class Question:
+    index: tuple
+    text: str
+    answer: str
+    category: str
+    value: int = -1
+    dd: bool = False
+    complete: bool = False
+    image: bool = False
+    image_url: str = None
+    actual_results: str = None
+
+
+class Board(object):
+    size = (6, 5)
+
+    def __init__(self, categories, questions, dj=False):
+        self.categories = categories
+        self.dj = dj
+        if not questions is None:
+            self.questions = questions
+        else:
+            self.questions = []
+
+    def get_question(self, i, j):
+        for q in self.questions:
+            if q.index == (i, j):
+                return q
+        return None
+
+    def complete(self):
+        return len(self.questions) == 30
+
+
+class FinalBoard(Board):
+    size = (1, 1)
+
+    def __init__(self, category, question):
+        super().__init__([category], [question], dj=False)
+        self.category = category
+        self.question = question
+
+    def complete(self):
+        return len(self.questions) == 1
+
+
+@dataclass
+class GameData:
+    rounds: list
+    date: str
+    comments: str
+
+    def complete(self):
+        return all(b.complete() for b in self.rounds)
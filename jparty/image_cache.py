@@ -0,0 +1,159 @@
+from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtCore import QObject, pyqtSignal
+
+import os
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from jparty import net
+from jparty.constants import IMAGE_CACHE, IMAGE_CACHE_BYTES
+
+
+class DiskCache(object):
+    """Size-bounded directory of downloaded files, evicting least recently used"""
+
+    def __init__(self, path=IMAGE_CACHE, max_bytes=IMAGE_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.__lock = threading.Lock()
+        self.__size = 0
+        for f in path.iterdir():
+            if not f.is_file():
+                continue
+            if f.suffix == ".part":  # left by a download that was interrupted
+                f.unlink(missing_ok=True)
+            else:
+                self.__size += f.stat().st_size
+
+    def __file(self, key):
+        return self.path / hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        f = self.__file(key)
+        try:
+            data = f.read_bytes()
+        except FileNotFoundError:
+            return None
+        os.utime(f)  # mtime doubles as last use
+        return data
+
+    def put(self, key, data):
+        f = self.__file(key)
+        tmp = f.with_suffix(".part")
+        tmp.write_bytes(data)
+        with self.__lock:
+            try:
+                old_size = f.stat().st_size  # overwriting a key frees its old file
+            except FileNotFoundError:
+                old_size = 0
+            tmp.replace(f)
+            self.__size += len(data) - old_size
+            if self.__size > self.max_bytes:
+                self.__evict()
+
+    def __evict(self):
+        files = sorted(
+            # .part files belong to puts still being written
+            (f for f in self.path.iterdir() if f.is_file() and f.suffix != ".part"),
+            key=lambda f: f.stat().st_mtime,
+        )
+        for f in files:
+            if self.__size <= self.max_bytes * 0.9:
+                break
+            try:
+                size = f.stat().st_size
+                f.unlink()
+                self.__size -= size
+            except FileNotFoundError:
+                pass
+
+
+class ImageCache(QObject):
+    """Shared decoded images for question media, filled in the background.
+    Decoding happens on worker threads as QImage; QPixmaps are only made
+    on the GUI thread, in pixmap()."""
+
+    image_ready = pyqtSignal(str)
+
+    def __init__(self, max_images=64, workers=6):
+        super().__init__()
+        self.max_images = max_images
+        self.disk = DiskCache()
+        self.__images = OrderedDict()
+        self.__pixmaps = {}
+        self.__pending = set()
+        self.__lock = threading.Lock()
+        self.__pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image_cache")
+
+    def prefetch(self, urls):
+        """Start loading every url (or local path) not already cached or loading"""
+        for url in urls:
+            url = str(url)
+            with self.__lock:
+                if url in self.__images or url in self.__pending:
+                    continue
+                self.__pending.add(url)
+            self.__pool.submit(self.__load, url)
+
+    def __load(self, url):
+        try:
+            downloaded = False
+            if Path(url).exists():
+                data = Path(url).read_bytes()
+            else:
+                data = self.disk.get(url)
+                if data is None:
+                    response = net.get(url, deadline=15)
+                    response.raise_for_status()
+                    data = response.content
+                    downloaded = True
+            image = QImage.fromData(data)
+            if image.isNull():
+                raise ValueError("not an image")
+            if downloaded:
+                self.disk.put(url, data)
+        except Exception as e:
+            logging.error(f"Failed to load image {url}: {e}")
+            image = QImage()
+        with self.__lock:
+            self.__pending.discard(url)
+            self.__images[url] = image
+            while len(self.__images) > self.max_images:
+                old, _ = self.__images.popitem(last=False)
+                self.__pixmaps.pop(old, None)
+        self.image_ready.emit(url)
+
+    def put(self, url, data):
+        """Add image bytes fetched elsewhere, e.g. by the host's image preview"""
+        url = str(url)
+        image = QImage.fromData(data)
+        if image.isNull():
+            return
+        if not Path(url).exists():
+            self.disk.put(url, data)
+        with self.__lock:
+            self.__images[url] = image
+            self.__pixmaps.pop(url, None)
+
+    def loading(self, url):
+        with self.__lock:
+            return str(url) in self.__pending
+
+    def pixmap(self, url):
+        """Cached QPixmap for url, or None if it hasn't been loaded. GUI thread only."""
+        url = str(url)
+        with self.__lock:
+            if url not in self.__images:
+                return None
+            self.__images.move_to_end(url)
+            image = self.__images[url]
+            if url not in self.__pixmaps:
+                self.__pixmaps[url] = QPixmap.fromImage(image)
+            return self.__pixmaps[url]
+
+
+image_cache = ImageCache()
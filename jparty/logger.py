@@ -1,21 +1,119 @@
 import sys
 import os
+import gzip
+import atexit
+import time
+import queue
+import shutil
+import threading
 import traceback
 import logging
+import logging.handlers
 from PyQt6.QtCore import QObject, pyqtSignal
 from PyQt6.QtWidgets import QMessageBox, QApplication
 import webbrowser
 from urllib.parse import quote
 from jparty.version import version
 from jparty.environ import root
+from jparty.constants import LOG_LEVELS, LOG_MAX_BYTES, LOG_BACKUPS, LOG_RATE, LOG_BURST
 
 log_filename = os.path.join(root, "latest.log")
-logging.basicConfig(
-    filename=log_filename, encoding="utf-8", level=logging.DEBUG, filemode="w"
-)
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Size-rotated log whose archives (latest.log.1.gz, ...) are gzipped"""
+
+    def __init__(self, filename, maxBytes, backupCount):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding="utf-8")
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self.__compress
+
+    @staticmethod
+    def __compress(source, dest):
+        with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per call site: lets `burst` records through at once and
+    `rate` per second after that. Warnings and errors are never dropped.
+    The next record let through says how many were dropped."""
+
+    def __init__(self, rate=LOG_RATE, burst=LOG_BURST):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.__buckets = {}  # call site: [tokens, last update, suppressed]
+        self.__lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        site = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self.__lock:
+            bucket = self.__buckets.get(site)
+            if bucket is None:
+                bucket = self.__buckets[site] = [self.burst, now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
+
+
+def parse_levels(spec):
+    """Levels given as "module=LEVEL,other.module=LEVEL", e.g. in $JPARTY_LOG_LEVELS"""
+    levels = {}
+    for part in spec.split(","):
+        if "=" in part:
+            name, level = part.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging():
+    """Log through a queue so that callers on the GUI and IOLoop threads never
+    wait on file I/O. A background thread writes the records to latest.log."""
+    levels = dict(LOG_LEVELS)
+    levels.update(parse_levels(os.environ.get("JPARTY_LOG_LEVELS", "")))
+    for name, level in levels.items():
+        logging.getLogger(name or None).setLevel(level)
+
+    file_handler = CompressingRotatingFileHandler(log_filename, LOG_MAX_BYTES, LOG_BACKUPS)
+    if os.path.exists(log_filename) and os.path.getsize(log_filename) > 0:
+        file_handler.doRollover()  # every run starts a fresh latest.log
+    file_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s:%(name)s:%(threadName)s: %(message)s")
+    )
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter())
+    logging.getLogger().addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+listener = setup_logging()
+atexit.register(listener.stop)
 log = logging.getLogger(__name__)
 
 
+def flush():
+    """Block until everything logged so far has been written"""
+    listener.stop()
+    listener.start()
+
+
 def mailto(recipients, subject, body):
     "recipients: string with comma-separated emails (no spaces!)"
     webbrowser.open(
@@ -36,6 +134,7 @@ def show_exception_box(log_msg):
             defaultButton=QMessageBox.StandardButton.Yes,
         )
         if button is QMessageBox.StandardButton.Yes:
+            flush()
             with open(log_filename, "r") as f:
                 logdata = f.read()
             message = f"""JPARTY ERROR REPORT:
@@ -14,13 +14,14 @@ from jparty.style import JPartyStyle
 from jparty.utils import resource_path
 from jparty.logger import qt_exception_hook
 from jparty.constants import PORT
+from jparty import net
 
 
 def check_internet():
     """check internet connection"""
     try:
-        requests.get("http://www.j-archive.com/")
-    except requests.exceptions.ConnectionError:  # This is the correct syntax
+        net.get("http://www.j-archive.com/", deadline=10)
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
         logging.error("Connection Error")
         QMessageBox.critical(
             None,
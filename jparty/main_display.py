@@ -146,9 +146,7 @@ class DisplayWindow(QMainWindow):
         self.game.close()
 
     def player_widget(self, player):
-        for pw in self.scoreboard.player_widgets:
-            if pw.player is player:
-                return pw
+        return self.game.registry.widget(player, self.scoreboard)
 
     def remove_card(self, q):
         for label in self.board_widget.question_labels:
@@ -0,0 +1,74 @@
+import json
+import logging
+import threading
+
+from jparty.constants import QUESTION_MEDIA, MEDIA_MANIFESTS
+
+# game_id -> (media folder mtime, manifest)
+_manifests = {}
+_lock = threading.Lock()
+
+
+def media_mtime(game_id):
+    """mtime of the question media folder for a game, 0 if it doesn't exist"""
+    game_media_path = QUESTION_MEDIA / str(game_id)
+    try:
+        return game_media_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def scan_media(game_id):
+    """Map "round-category-question" file stems to paths for a game's media folder"""
+    manifest = {}
+    game_media_path = QUESTION_MEDIA / str(game_id)
+    if game_media_path.is_dir():
+        for media_file in game_media_path.iterdir():
+            manifest.setdefault(media_file.stem, str(media_file))
+    return manifest
+
+
+def build_manifest(game_id, mtime=None):
+    if mtime is None:
+        mtime = media_mtime(game_id)
+    manifest = scan_media(game_id)
+    if mtime:
+        with (MEDIA_MANIFESTS / f"{game_id}.json").open("w") as f:
+            json.dump({"mtime": mtime, "media": manifest}, f)
+    return manifest
+
+
+def media_manifest(game_id):
+    """Question media for a game, rebuilt only when its folder changes"""
+    mtime = media_mtime(game_id)
+    with _lock:
+        cached = _manifests.get(str(game_id))
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    manifest = None
+    if mtime:
+        try:
+            with (MEDIA_MANIFESTS / f"{game_id}.json").open("r") as f:
+                saved = json.load(f)
+            if saved["mtime"] == mtime:
+                manifest = saved["media"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+    if manifest is None:
+        logging.info(f"rebuilding media manifest for {game_id}")
+        manifest = build_manifest(game_id, mtime) if mtime else {}
+
+    with _lock:
+        _manifests[str(game_id)] = (mtime, manifest)
+    return manifest
+
+
+def build_all_manifests():
+    """Build manifests for every game folder in the media tree"""
+    count = 0
+    for game_media_path in sorted(QUESTION_MEDIA.iterdir()):
+        if game_media_path.is_dir():
+            build_manifest(game_media_path.name)
+            count += 1
+    return count
@@ -0,0 +1,217 @@
+import time
+import logging
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = (5, 20)  # (connect, read) seconds
+USER_AGENT = "JParty (https://github.com/stuartthomas25/JParty)"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without touching the network while an upstream is failing"""
+
+
+class Cancelled(requests.exceptions.RequestException):
+    """Raised when a call is abandoned through its `cancel` event"""
+
+
+class UpstreamStats(object):
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "mean_latency": self.total_latency / self.requests if self.requests else 0.0,
+            "max_latency": self.max_latency,
+        }
+
+
+class CircuitBreaker(object):
+    """Opens after `threshold` consecutive failures; after `cooldown` seconds
+    a single trial call is let through and closes it again on success"""
+
+    def __init__(self, threshold=5, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            self.opened_at = time.monotonic()  # half open: one trial per cooldown
+            return True
+        return False
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+class CancelWatcher(object):
+    """Shuts the connection of each watched response once its cancel event is
+    set, so a thread blocked reading a slow body wakes up right away instead
+    of waiting out its read timeout"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.__lock = threading.Lock()
+        self.__watched = {}  # response -> cancel event
+        self.__thread = None
+
+    def watch(self, cancel, r):
+        with self.__lock:
+            self.__watched[r] = cancel
+            if self.__thread is None:
+                self.__thread = threading.Thread(
+                    target=self.__run, name="http_cancel", daemon=True
+                )
+                self.__thread.start()
+
+    def unwatch(self, r):
+        with self.__lock:
+            self.__watched.pop(r, None)
+
+    def __run(self):
+        while True:
+            time.sleep(self.interval)
+            with self.__lock:
+                cancelled = [r for r, cancel in self.__watched.items() if cancel.is_set()]
+                for r in cancelled:
+                    del self.__watched[r]
+            for r in cancelled:
+                # urllib3 >= 2.3 can interrupt a read blocked in another thread
+                try:
+                    if hasattr(r.raw, "shutdown"):
+                        r.raw.shutdown()
+                    else:
+                        r.close()
+                except Exception as e:
+                    logging.debug("closing cancelled response: %s", e)
+
+
+_watcher = CancelWatcher()
+
+
+class HttpClient(object):
+    """Connection-pooled HTTP client shared by everything that hits the network.
+    Keeps one keep-alive pool per host, so consecutive calls to the same
+    upstream (e.g. a wayback CDX query and its snapshot) reuse a connection."""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, pool_size=16, failure_threshold=5, cooldown=30.0):
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.__lock = threading.Lock()
+        self.__breakers = {}
+        self.__stats = {}
+
+    def __upstream(self, host):
+        if host not in self.__breakers:
+            self.__breakers[host] = CircuitBreaker(self.failure_threshold, self.cooldown)
+            self.__stats[host] = UpstreamStats()
+        return self.__breakers[host], self.__stats[host]
+
+    def get(self, url, timeout=None, deadline=None, cancel=None, **kwargs):
+        """GET url. `timeout` bounds each connect/read, `deadline` bounds the
+        whole call including the body download, in seconds. Setting the
+        `cancel` event abandons the call as soon as the headers are in, and
+        shuts the connection if it is already reading the body."""
+        if cancel is not None and cancel.is_set():
+            raise Cancelled(url)
+        host = urlparse(url).hostname
+        with self.__lock:
+            breaker, stats = self.__upstream(host)
+            if not breaker.allow():
+                raise CircuitOpenError(f"{host} is failing, not retrying yet")
+
+        if timeout is None:
+            timeout = self.timeout
+        stream = kwargs.pop("stream", False)
+        chunked = not stream and (deadline is not None or cancel is not None)
+        start = time.monotonic()
+        try:
+            if deadline is not None:
+                connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+                timeout = (min(connect, deadline), min(read, deadline))
+            r = self.session.get(url, timeout=timeout, stream=stream or chunked, **kwargs)
+            if cancel is not None and cancel.is_set():
+                r.close()
+                raise Cancelled(url)
+            if chunked:
+                end = start + deadline if deadline is not None else float("inf")
+                self.__read_before(r, end, cancel)
+        except Cancelled:
+            raise
+        except Exception:
+            self.__record(breaker, stats, start, failed=True)
+            raise
+        self.__record(breaker, stats, start, failed=r.status_code >= 500)
+        return r
+
+    @staticmethod
+    def __read_before(r, end, cancel):
+        chunks = []
+        if cancel is not None:
+            _watcher.watch(cancel, r)
+        try:
+            with r:
+                for chunk in r.iter_content(64 * 1024):
+                    chunks.append(chunk)
+                    if time.monotonic() > end:
+                        raise requests.exceptions.Timeout(f"Deadline exceeded fetching {r.url}")
+                    if cancel is not None and cancel.is_set():
+                        raise Cancelled(r.url)
+        except requests.exceptions.RequestException:
+            # reading from a connection the watcher shut down fails, report it as cancelled
+            if cancel is not None and cancel.is_set():
+                raise Cancelled(r.url)
+            raise
+        finally:
+            if cancel is not None:
+                _watcher.unwatch(r)
+        r._content = b"".join(chunks)
+
+    def __record(self, breaker, stats, start, failed):
+        latency = time.monotonic() - start
+        with self.__lock:
+            stats.requests += 1
+            stats.total_latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
+            if failed:
+                stats.failures += 1
+                breaker.failure()
+            else:
+                breaker.success()
+        if failed:
+            logging.info(f"request failed after {latency:.2f}s")
+
+    def stats(self):
+        with self.__lock:
+            return {host: s.as_dict() for host, s in self.__stats.items()}
+
+
+client = HttpClient()
+
+
+def get(url, **kwargs):
+    return client.get(url, **kwargs)
@@ -0,0 +1,110 @@
+import time
+import logging
+import weakref
+from bisect import bisect_left
+from collections import deque
+
+from jparty.constants import OUTBOUND_MAX_IN_FLIGHT, OUTBOUND_BACKLOG
+
+log = logging.getLogger(__name__)
+
+
+class LatencyHistogram(object):
+    """Counts of latencies falling under each bound, in milliseconds"""
+
+    bounds = [0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 250, 1000, float("inf")]
+
+    def __init__(self):
+        self.counts = [0] * len(self.bounds)
+
+    def add(self, latency):
+        self.counts[bisect_left(self.bounds, 1000 * latency)] += 1
+
+    def summary(self):
+        return {f"<{b}ms": n for b, n in zip(self.bounds, self.counts) if n}
+
+
+class ClientChannel(object):
+    """Writes still being flushed to one client, and what waits behind them"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.backlog = deque(maxlen=OUTBOUND_BACKLOG)
+        self.dropped = 0
+
+
+class OutboundQueue(object):
+    """All writes to buzzer and lectern sockets go through here.
+
+    push() can be called from any thread: commands are appended to a deque
+    and drained in one batch per IOLoop.add_callback, so the GUI thread never
+    touches a socket. A client with OUTBOUND_MAX_IN_FLIGHT writes not yet
+    flushed to the network gets the rest held in a bounded backlog, dropping
+    the oldest, so one slow phone can't hold up the others."""
+
+    def __init__(self, controller, report_every=200):
+        self.controller = controller
+        self.report_every = report_every
+        self.histogram = LatencyHistogram()
+        self.__queue = deque()
+        self.__scheduled = False
+        self.__channels = weakref.WeakKeyDictionary()
+        self.__written = 0
+
+    def push(self, client, method, *args):
+        """Call client.method(*args) on the IOLoop thread, e.g.
+        push(player.waiter, "send", "PROMPTANSWER")"""
+        self.__queue.append((time.monotonic(), client, method, args))
+        if not self.__scheduled:
+            self.__scheduled = True
+            self.controller.call_soon(self.__drain)
+
+    def write_now(self, client, method, *args):
+        """push() for callers already on the IOLoop thread. Anything pushed
+        earlier is written first, so e.g. a lock never overtakes a PROMPTANSWER"""
+        self.__drain()
+        self.__write((time.monotonic(), client, method, args))
+
+    def __drain(self):
+        # clear the flag first: anything pushed from here on schedules a new drain
+        self.__scheduled = False
+        while self.__queue:
+            self.__write(self.__queue.popleft())
+
+    def __channel(self, client):
+        channel = self.__channels.get(client)
+        if channel is None:
+            channel = self.__channels[client] = ClientChannel()
+        return channel
+
+    def __write(self, command):
+        channel = self.__channel(command[1])
+        if channel.in_flight >= OUTBOUND_MAX_IN_FLIGHT:
+            if len(channel.backlog) == channel.backlog.maxlen:
+                channel.dropped += 1
+                log.warning("dropping message for slow client (%s so far)", channel.dropped)
+            channel.backlog.append(command)
+            return
+
+        queued, client, method, args = command
+        future = getattr(client, method)(*args)
+        if future is None:  # closing, or the write failed
+            self.__record(queued)
+            return
+        channel.in_flight += 1
+        future.add_done_callback(lambda f: self.__flushed(client, queued, f))
+
+    def __flushed(self, client, queued, future):
+        if not future.cancelled():
+            future.exception()  # e.g. the socket closed, which on_close handles
+        self.__record(queued)
+        channel = self.__channel(client)
+        channel.in_flight -= 1
+        while channel.backlog and channel.in_flight < OUTBOUND_MAX_IN_FLIGHT:
+            self.__write(channel.backlog.popleft())
+
+    def __record(self, queued):
+        self.histogram.add(time.monotonic() - queued)
+        self.__written += 1
+        if self.__written % self.report_every == 0:
+            log.info("outbound enqueue to wire latency: %s", self.histogram.summary())
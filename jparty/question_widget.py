@@ -16,12 +16,14 @@ from PyQt6.QtWidgets import (
     QSizePolicy,
     QLineEdit,
 )
-from PyQt6.QtCore import Qt, QUrl, QTimer, QObject, QEvent
+from PyQt6.QtCore import Qt, QUrl, QTimer, QObject, QEvent, pyqtSignal
 from PyQt6.QtNetwork import QNetworkAccessManager, QNetworkRequest
 import requests
+import threading
 from pathlib import Path
 from jparty.style import MyLabel, CARDPAL
-from jparty.utils import search_wikimedia_image
+from jparty.wikimedia import wikimedia
+from jparty.image_cache import image_cache
 
 
 class QuestionWidget(QWidget):
@@ -82,6 +84,8 @@ class HostQuestionWidget(QuestionWidget):
 class HostImageQuestionWidget(QWidget):
     """Widget to display and manage an image-based question for a game."""
 
+    search_finished = pyqtSignal(int, str)
+
     def __init__(self, game, parent=None):
         """
         Initialize the widget with game state and setup UI components.
@@ -94,10 +98,16 @@ class HostImageQuestionWidget(QWidget):
         self.game = game
         self.question = game.active_question
         self.current_pixmap = None
-        self.image_url = self.get_initial_image_url()
+        self.current_image_data = None
+        self.image_reply = None
+        self.search_generation = 0
+        self.search_cancel = None
+        self.search_finished.connect(self.on_search_finished)
 
         self.setup_ui()
-        self.fetch_image(self.image_url)
+        self.image_url = self.get_initial_image_url()
+        if self.image_url is not None:
+            self.fetch_image(self.image_url)
 
     def setup_ui(self):
         """Set up the UI components and layout."""
@@ -180,33 +190,84 @@ class HostImageQuestionWidget(QWidget):
         self.right_layout.addLayout(self.buttons_layout)
 
     def get_initial_image_url(self):
-        """Retrieve the initial image URL for the question."""
-        return self.question.image_url or search_wikimedia_image(self.question.answer)
+        """Retrieve the initial image URL for the question, usually resolved at game load.
+        If it isn't known yet, search in the background and return None."""
+        if self.question.image_url:
+            return self.question.image_url
+        hit, url = wikimedia.cached(self.question.answer)
+        if hit:
+            return url or "No image found."
+        self.search_image(self.question.answer)
+        return None
+
+    def search_image(self, query):
+        """Search Wikimedia off the GUI thread, cancelling any search in flight."""
+        if self.search_cancel is not None:
+            self.search_cancel.set()
+        self.search_generation += 1
+        generation = self.search_generation
+        cancel = threading.Event()
+        self.search_cancel = cancel
+
+        def run():
+            try:
+                url = wikimedia.search(query, cancel)
+            except Exception as e:
+                if cancel.is_set():
+                    return
+                url = f"Error: {e}"
+            if not cancel.is_set():
+                try:
+                    self.search_finished.emit(generation, url)
+                except RuntimeError:
+                    pass  # widget was closed while searching
+
+        threading.Thread(target=run, name="image_search", daemon=True).start()
+
+    def on_search_finished(self, generation, url):
+        """Show the result of the latest search, ignoring superseded ones."""
+        if generation != self.search_generation:
+            return
+        self.search_cancel = None
+        self.image_url = url
+        self.fetch_image(url)
 
     def fetch_image(self, path_or_url):
         """Fetch the image from a local path or URL."""
-        if Path(path_or_url).exists():
+        cached = image_cache.pixmap(path_or_url)
+        if cached is not None and not cached.isNull():
+            self.current_image_data = None
+            self.handle_pixmap_load(cached)
+        elif Path(path_or_url).exists():
             self.load_image_from_file(path_or_url)
         else:
             self.load_image_from_url(path_or_url)
 
     def load_image_from_file(self, file_path):
         """Load an image from a local file and display it."""
+        self.current_image_data = None
         pixmap = QPixmap(file_path)
         self.handle_pixmap_load(pixmap)
 
     def load_image_from_url(self, url):
         """Download and load an image from a URL."""
+        if self.image_reply is not None:
+            old_reply, self.image_reply = self.image_reply, None
+            old_reply.abort()
         self.network_manager = QNetworkAccessManager(self.image_label)
         self.network_manager.finished.connect(self.on_image_downloaded)
         request = QNetworkRequest(QUrl(url))
-        self.network_manager.get(request)
+        self.image_reply = self.network_manager.get(request)
 
     def on_image_downloaded(self, reply):
         """Handle the downloaded image and display it."""
+        if reply is not self.image_reply:
+            return  # superseded by a newer image
+        self.image_reply = None
         if reply.error() == reply.NetworkError.NoError:
+            self.current_image_data = reply.readAll().data()
             pixmap = QPixmap()
-            pixmap.loadFromData(reply.readAll())
+            pixmap.loadFromData(self.current_image_data)
             self.handle_pixmap_load(pixmap)
         else:
             self.image_label.setText("Failed to load image.")
@@ -226,12 +287,15 @@ class HostImageQuestionWidget(QWidget):
     def debounced_input_changed(self):
         """Update the image URL or query after debounce."""
         input_text = self.textbox.text()
-        self.image_url = (
-            input_text if input_text.startswith("https://")
-            else search_wikimedia_image(input_text)
-        )
-        self.fetch_image(self.image_url)
         self.update_accept_button(input_text)
+        if input_text.startswith("https://"):
+            if self.search_cancel is not None:
+                self.search_cancel.set()
+            self.search_generation += 1
+            self.image_url = input_text
+            self.fetch_image(self.image_url)
+        else:
+            self.search_image(input_text)
 
     def update_accept_button(self, input_text):
         """Enable or disable the accept button based on input."""
@@ -257,6 +321,9 @@ class HostImageQuestionWidget(QWidget):
         """Handle accept image button click."""
         self.question.image = True
         self.question.image_url = self.image_url
+        if self.current_image_data is not None:
+            # hand the preview to the main display so it doesn't download it again
+            image_cache.put(self.image_url, self.current_image_data)
         self.game.accept_image()
 
     def on_no_image_needed_clicked(self):
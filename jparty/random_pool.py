@@ -0,0 +1,103 @@
+import json
+import time
+import random
+import logging
+import threading
+
+from jparty.retrieve import get_game, load_game, get_random_game
+from jparty.corpus import corpus
+from jparty.constants import RANDOM_POOL, RANDOM_POOL_SIZE, RANDOM_POOL_DELAY
+
+
+class RandomGamePool(object):
+    """Keeps `size` random games downloaded, parsed and validated ahead of time.
+    The ids are saved to disk and the parsed games live in the corpus store,
+    so the pool survives restarts. Complete games already in the corpus index
+    are drawn first; j-archive's random game is only asked once they run out."""
+
+    def __init__(self, size=RANDOM_POOL_SIZE, path=RANDOM_POOL):
+        self.size = size
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__wakeup = threading.Event()
+        self.__thread = None
+        self.game_ids = []
+        self.__taken = set()  # ids handed out this session, not drawn again
+        try:
+            with path.open("r") as f:
+                self.game_ids = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    def start(self):
+        if self.__thread is None:
+            self.__thread = threading.Thread(target=self.__refill, name="random_pool", daemon=True)
+            self.__thread.start()
+        self.__wakeup.set()
+
+    def __save(self):
+        with self.path.open("w") as f:
+            json.dump(self.game_ids, f)
+
+    def __candidate(self):
+        with self.__lock:
+            skip = set(self.game_ids) | self.__taken
+        indexed = [
+            int(row["game_id"])
+            for row in corpus.query_index(complete=True)
+            if row["game_id"].isdigit() and int(row["game_id"]) not in skip
+        ]
+        if indexed:
+            return random.choice(indexed)
+        return get_random_game()
+
+    def __refill(self):
+        while True:
+            self.__wakeup.wait()
+            self.__wakeup.clear()
+            while len(self.game_ids) < self.size:
+                # every draw waits, including ones skipped as known incomplete,
+                # so a run of bad ids can't hammer j-archive
+                time.sleep(RANDOM_POOL_DELAY)
+                try:
+                    game_id = self.__candidate()
+                    if corpus.known_incomplete(game_id):
+                        continue
+                    data = load_game(game_id)
+                except Exception as e:
+                    logging.error(f"Random pool refill failed: {e}")
+                    time.sleep(5)
+                    continue
+                if data is not None and data.complete():
+                    with self.__lock:
+                        if game_id not in self.game_ids:
+                            self.game_ids.append(game_id)
+                            self.__save()
+                    logging.info(f"Random pool has {len(self.game_ids)} games")
+
+    def take(self):
+        """Return (game_id, data) for a valid random game, from the pool if possible"""
+        while True:
+            with self.__lock:
+                game_id = self.game_ids.pop(0) if self.game_ids else None
+                self.__save()
+                if game_id is not None:
+                    self.__taken.add(game_id)
+            self.start()
+            if game_id is None:
+                break
+            data = get_game(game_id)
+            if data is not None and data.complete():
+                return game_id, data
+
+        # pool is empty, fetch one directly
+        while True:
+            game_id = get_random_game()
+            logging.info(f"GAMEID {game_id}")
+            data = get_game(game_id)
+            if data is not None and data.complete():
+                return game_id, data
+            time.sleep(RANDOM_POOL_DELAY)
+
+
+random_pool = RandomGamePool()
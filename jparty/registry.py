@@ -0,0 +1,114 @@
+from threading import Lock
+
+
+class PlayerRegistry(object):
+    """Every player in the game, in lectern order, indexed by token, buzzer
+    connection, player number and display widget.
+
+    `players` is the list the rest of the game iterates. It is only ever
+    changed in place, through this class, so the indexes and each player's
+    player_number always agree with it. Players join and reconnect on the
+    IOLoop thread while the GUI thread removes and reorders them, so changes
+    take a lock; lookups are single dict or list reads and don't."""
+
+    def __init__(self):
+        self.players = []
+        self.__lock = Lock()
+        self.__by_token = {}  # token hex -> player
+        self.__by_connection = {}  # BuzzerSocketHandler -> player
+        self.__widgets = {}  # player -> {scoreboard: widget}
+
+    def __len__(self):
+        return len(self.players)
+
+    def __iter__(self):
+        return iter(list(self.players))
+
+    def __contains__(self, player):
+        return self.__by_token.get(player.token.hex()) is player
+
+    # lookups
+
+    def with_token(self, token):
+        return self.__by_token.get(token)
+
+    def with_connection(self, connection):
+        return self.__by_connection.get(connection)
+
+    def with_number(self, player_number):
+        players = self.players
+        if 0 <= player_number < len(players):
+            return players[player_number]
+        return None
+
+    def widget(self, player, owner):
+        return self.__widgets.get(player, {}).get(owner)
+
+    # changes
+
+    def add(self, player):
+        with self.__lock:
+            player.renumber(len(self.players))
+            self.players.append(player)
+            self.__by_token[player.token.hex()] = player
+            self.__by_connection[player.waiter] = player
+
+    def reconnect(self, player, connection):
+        with self.__lock:
+            if self.__by_connection.get(player.waiter) is player:
+                del self.__by_connection[player.waiter]
+            player.waiter = connection
+            if player in self:
+                self.__by_connection[connection] = player
+
+    def remove(self, player):
+        with self.__lock:
+            if player not in self:
+                return False
+            self.players.remove(player)
+            del self.__by_token[player.token.hex()]
+            if self.__by_connection.get(player.waiter) is player:
+                del self.__by_connection[player.waiter]
+            self.__widgets.pop(player, None)
+            self.__renumber(player.player_number)
+            return True
+
+    def move(self, player, offset):
+        """Swap player with the one `offset` places along, returning whether it moved"""
+        with self.__lock:
+            if player not in self:
+                return False
+            i = player.player_number
+            j = i + offset
+            if not 0 <= j < len(self.players):
+                return False
+            players = self.players
+            players[i], players[j] = players[j], players[i]
+            self.__renumber(min(i, j))
+            return True
+
+    def attach(self, player, owner, widget):
+        """Record the widget showing player on the scoreboard `owner`"""
+        self.__widgets.setdefault(player, {})[owner] = widget
+
+    def clear(self):
+        with self.__lock:
+            del self.players[:]
+            self.__by_token.clear()
+            self.__by_connection.clear()
+            self.__widgets.clear()
+
+    def __renumber(self, start):
+        for i in range(start, len(self.players)):
+            self.players[i].renumber(i)
+
+    def check(self):
+        """Raise AssertionError if the indexes disagree with `players`"""
+        with self.__lock:
+            assert len(self.__by_token) == len(self.players)
+            assert len(self.__by_connection) == len(self.players)
+            for i, p in enumerate(self.players):
+                assert p.player_number == i, (p.player_number, i)
+                assert self.__by_token[p.token.hex()] is p
+                assert self.__by_connection[p.waiter] is p
+            assert set(self.__widgets) <= set(self.players)
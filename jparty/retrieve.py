@@ -1,13 +1,24 @@
-import requests
 from bs4 import BeautifulSoup
+try:
+    import lxml.html
+except ImportError:  # fall back to the BeautifulSoup parser
+    lxml = None
 from html import unescape
 import re
 import json
-from jparty.game import Question, Board, FinalBoard, GameData
+from jparty.gamedata import Question, Board, FinalBoard, GameData
 import logging
 import csv
 import os
-from jparty.constants import MONIES, SAVED_GAMES, QUESTION_MEDIA
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from jparty.constants import MONIES, SAVED_GAMES, HEDGE_DELAY
+from jparty.corpus import corpus, content_hash
+from jparty.media import media_manifest
+from jparty import net
+
+# bump whenever process_game_board_from_html changes its output
+PARSER_VERSION = 1
 
 
 def list_to_game(s):
@@ -45,13 +56,70 @@ def list_to_game(s):
 
 def get_Gsheet_game(file_id):
     csv_url = f"https://docs.google.com/spreadsheet/ccc?key={file_id}&output=csv"
-    with requests.get(csv_url, stream=True) as r:
+    with net.get(csv_url, stream=True) as r:
         lines = (line.decode("utf-8") for line in r.iter_lines())
         r3 = csv.reader(lines)
         return list_to_game(list(r3))
 
 
-def get_game_html(game_id):
+def valid_game_html(html):
+    """Cheap check that a page is a j-archive game rather than an error page"""
+    return html is not None and 'id="game_title"' in html
+
+
+_fetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="game_fetch")
+
+
+def get_game_html_hedged(game_id, delay=HEDGE_DELAY):
+    """Ask the preferred source for the game, and the other source too if no
+    valid page has arrived after `delay` seconds. The first valid page wins
+    and the slower fetch is cancelled. The source that has won the most
+    fetches, as recorded in the corpus, is preferred."""
+    sources = {"wayback": get_wayback_game_html, "j-archive": get_jarchive_game_html}
+    wins = corpus.source_wins()
+    order = sorted(sources, key=lambda s: -wins.get(s, 0))
+    cancel = threading.Event()
+    pending = {}
+    error = None
+
+    def launch():
+        source = order.pop(0)
+        print(f"using {source}")
+        pending[_fetch_pool.submit(sources[source], game_id, cancel)] = source
+
+    launch()
+    try:
+        while pending:
+            done, _ = wait(
+                pending, timeout=delay if order else None, return_when=FIRST_COMPLETED
+            )
+            if not done:  # preferred source is slow, hedge
+                launch()
+                continue
+            for future in done:
+                source = pending.pop(future)
+                try:
+                    game_html = future.result()
+                except Exception as e:
+                    logging.error(f"{source} failed: {e}")
+                    error = e
+                    continue
+                if not valid_game_html(game_html):
+                    error = Exception(f"{source} did not return a game")
+                    continue
+                corpus.record_source_win(source)
+                logging.info(f"{source} won the fetch for {game_id}")
+                return game_html
+            if not pending and order:  # everything in flight failed
+                launch()
+    finally:
+        cancel.set()  # losers still in flight stop in net.get
+        for future in pending:
+            future.cancel()  # and ones still queued never start
+    raise error
+
+
+def get_game_html(game_id, hedge=True):
     saved_game_path = SAVED_GAMES / f"{game_id}.html"
     if saved_game_path.exists():
         print("game is saved, try using saved game")
@@ -61,6 +129,8 @@ def get_game_html(game_id):
                 return game_html
         except UnicodeDecodeError:
             print("UnicodeDecodeError on saved game, trying from internet")
+    if hedge:
+        return get_game_html_hedged(game_id)
     try:
         print("using wayback machine")
         game_html = get_wayback_game_html(game_id)
@@ -72,19 +142,65 @@ def get_game_html(game_id):
 
 def get_game(game_id):
     os.environ["JPARTY_GAME_ID"] = str(game_id)
+    return load_game(game_id)
+
+
+def load_game(game_id):
+    """get_game without marking game_id as the current game"""
     if len(str(game_id)) < 7:
+        game_data = corpus.load(game_id, PARSER_VERSION)
+        if game_data is not None:
+            return game_data
+        if corpus.known_incomplete(game_id):
+            logging.info(f"{game_id} is known to be incomplete")
+            return None
         game_html = get_game_html(game_id)
-        return process_game_board_from_html(game_html, game_id)
+        game_data = process_game_board_from_html(game_html, game_id)
+        if game_data is not None:
+            corpus.save(game_id, content_hash(game_html), PARSER_VERSION, game_data)
+        else:
+            corpus.mark_incomplete(game_id, *game_metadata(game_html))
+        return game_data
     else:
         return get_Gsheet_game(str(game_id))
 
 
+def ingest_saved_games(directory=SAVED_GAMES):
+    """Parse every saved <game_id>.html in directory into the corpus store.
+    Files whose content and parser version are unchanged are skipped."""
+    ingested = skipped = failed = 0
+    for html_path in sorted(directory.glob("*.html")):
+        game_id = html_path.stem
+        try:
+            game_html = html_path.read_text(encoding="utf-8")
+        except UnicodeDecodeError:
+            logging.error(f"UnicodeDecodeError reading {html_path}")
+            failed += 1
+            continue
+        html_hash = content_hash(game_html)
+        if corpus.is_current(game_id, html_hash, PARSER_VERSION):
+            skipped += 1
+            continue
+        try:
+            game_data = process_game_board_from_html(game_html, game_id)
+        except Exception as e:
+            logging.error(f"Failed to parse {html_path}: {e}")
+            game_data = None
+        if game_data is None:
+            corpus.mark_incomplete(game_id, *game_metadata(game_html))
+            failed += 1
+            continue
+        corpus.save(game_id, html_hash, PARSER_VERSION, game_data)
+        ingested += 1
+    return ingested, skipped, failed
+
+
 def findanswer(clue):
     return re.findall(r'correct_response">(.*?)</em', unescape(str(clue)))[0]
 
-def get_jarchive_game_html(game_id):
+def get_jarchive_game_html(game_id, cancel=None):
     game_url = f"http://www.j-archive.com/showgame.php?game_id={game_id}"
-    r = requests.get(game_url)
+    r = net.get(game_url, deadline=20, cancel=cancel)
     return r.text
 
 def find_question_media(game_id: int, round: int, index: tuple) -> str:
@@ -95,13 +211,7 @@ def find_question_media(game_id: int, round: int, index: tuple) -> str:
         round: round number, 1-jeopardy, 2-double jeopardy
         index: (category, question) index, from top left 0-indexed
     """
-    game_media_path = QUESTION_MEDIA / str(game_id)
-    if game_media_path.exists():
-        potential_filename = f"{round}-{index[0]}-{index[1]}"
-        for media_file in game_media_path.iterdir():
-            if media_file.stem == potential_filename:
-                return str(media_file)
-    return False
+    return media_manifest(game_id).get(f"{round}-{index[0]}-{index[1]}", False)
 
 def get_actual_player_results(clue: BeautifulSoup, value: int):
     """Get the results from the actual jeopardy contestants"""
@@ -131,8 +241,28 @@ def get_actual_player_final(clue: BeautifulSoup) -> list[list[str]]:
         answers.append([player_answer.text, value])
     return answers
 
+def game_metadata(html):
+    """(date, comments) from a game page, either None if missing. Used to
+    index games too incomplete for process_game_board_from_html."""
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.select("#game_title > h1")
+    datesearch = re.search(r"- \w+, (.*?)$", title[0].text) if title else None
+    comments = soup.select("#game_comments")
+    return (
+        datesearch.groups()[0] if datesearch is not None else None,
+        comments[0].get_text() if comments else None,
+    )
+
+
 def process_game_board_from_html(html, game_id) -> GameData:
     """Given j-archive html, produce a game data object"""
+    if lxml is not None:
+        return process_game_board_from_html_lxml(html, game_id)
+    return process_game_board_from_html_bs4(html, game_id)
+
+
+def process_game_board_from_html_bs4(html, game_id) -> GameData:
+    """Pure-Python parser, used when lxml is unavailable"""
     soup = BeautifulSoup(html, "html.parser")
     datesearch = re.search(
         r"- \w+, (.*?)$", soup.select("#game_title > h1")[0].text
@@ -160,7 +290,7 @@ def process_game_board_from_html(html, game_id) -> GameData:
                 print(f"{game_id} is inccomplete")
                 logging.info("this game is incomplete")
                 return None
-            image_likely = text_obj.find('a')
+            image_likely = text_obj.find('a') is not None
             image_url = None
             text = text_obj.text
             # get actual player results
@@ -216,12 +346,159 @@ def process_game_board_from_html(html, game_id) -> GameData:
 
     return GameData(boards, date, comments)
 
-def get_wayback_game_html(game_id):
+def _class_xpath(tag, cls):
+    return f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+
+
+if lxml is not None:
+    _xp = {
+        name: lxml.etree.XPath(_class_xpath(tag, cls))
+        for name, tag, cls in [
+            ("round", "*", "round"),
+            ("final_round", "*", "final_round"),
+            ("category", "*", "category"),
+            ("category_name", "*", "category_name"),
+            ("clue", "*", "clue"),
+            ("clue_text", "*", "clue_text"),
+            ("daily_double", "*", "clue_value_daily_double"),
+            ("wrong", "td", "wrong"),
+            ("right", "td", "right"),
+        ]
+    }
+
+
+def _findanswer_lxml(el):
+    # serializing in C is cheap; keeps the same matching rules as findanswer
+    return findanswer(lxml.html.tostring(el, encoding="unicode"))
+
+
+def _actual_player_results_lxml(clue, value):
+    dd_value = _xp["daily_double"](clue)
+    if dd_value:
+        value = int(dd_value[0].text_content()[5:].replace(",", ""))
+    answers = [
+        [wrong_answer.text_content(), -value]
+        for wrong_answer in _xp["wrong"](clue)
+        if wrong_answer.text_content() != "Triple Stumper"
+    ]
+    right_answer = _xp["right"](clue)
+    if right_answer:
+        answers.append([right_answer[0].text_content(), value])
+    return answers
+
+
+def _actual_player_final_lxml(clue):
+    def wager(player_answer):
+        row = next(player_answer.getparent().itersiblings("tr"))
+        return int(row.text_content().strip()[1:].replace(",", ""))
+
+    answers = []
+    for player_answer in _xp["wrong"](clue):
+        answers.append([player_answer.text_content(), -wager(player_answer)])
+    for player_answer in _xp["right"](clue):
+        answers.append([player_answer.text_content(), wager(player_answer)])
+    return answers
+
+
+def process_game_board_from_html_lxml(html, game_id) -> GameData:
+    """Same output as process_game_board_from_html_bs4, using lxml's C parser"""
+    doc = lxml.html.document_fromstring(html)
+    datesearch = re.search(
+        r"- \w+, (.*?)$", doc.xpath('//*[@id="game_title"]/h1')[0].text_content()
+    )
+    if datesearch is None:
+        return None
+    date = datesearch.groups()[0]
+    comments_obj = doc.xpath('//*[@id="game_comments"]')[0]
+    if comments_obj.text:
+        comments = comments_obj.text
+    elif len(comments_obj) > 0:
+        comments = lxml.html.tostring(comments_obj[0], encoding="unicode", with_tail=False)
+    else:
+        comments = ""
+
+    # Normal Rounds
+    boards = []
+    rounds = _xp["round"](doc)
+    # Use only Double and Triple Jeopardy for Celebrity Jeopardy
+    if len(rounds) == 3:
+        rounds = rounds[:2]
+    for i, ro in enumerate(rounds):
+        categories = [
+            _xp["category_name"](c)[0].text_content() for c in _xp["category"](ro)
+        ]
+        questions = []
+        dds = 0
+        for clue in _xp["clue"](ro):
+            text_obj = _xp["clue_text"](clue)
+            if not text_obj:
+                print(f"{game_id} is inccomplete")
+                logging.info("this game is incomplete")
+                return None
+            text_obj = text_obj[0]
+            image_likely = text_obj.find(".//a") is not None
+            image_url = None
+            index_key = text_obj.get("id")
+            index = (
+                int(index_key[-3]) - 1,
+                int(index_key[-1]) - 1,
+            )  # get index from id string
+            dd = len(_xp["daily_double"](clue)) > 0
+            if dd:
+                dds += 1
+            if dds > i + 1:
+                dd = False
+            value = MONIES[i][index[1]]
+            actual_results = _actual_player_results_lxml(clue, value)
+            answer = _findanswer_lxml(clue)
+            potential_media_file = find_question_media(game_id, i, index)
+            if potential_media_file:
+                image_likely = True
+                image_url = potential_media_file
+            questions.append(
+                Question(
+                    index,
+                    text_obj.text_content(),
+                    answer,
+                    categories[index[0]],
+                    value,
+                    dd,
+                    image=image_likely,
+                    image_url=image_url,
+                    actual_results=actual_results,
+                )
+            )
+        boards.append(Board(categories, questions, dj=(i == 1)))
+
+    # Final Jeopardy
+    final_round_obj = _xp["final_round"](doc)[0]
+    category_obj = _xp["category"](final_round_obj)[0]
+    category = _xp["category_name"](category_obj)[0].text_content()
+    clue = _xp["clue"](final_round_obj)[0]
+    actual_results = _actual_player_final_lxml(clue)
+    text_obj = _xp["clue_text"](clue)
+    if not text_obj:
+        logging.info("this game is incomplete")
+        return None
+
+    text = text_obj[0].text_content()
+    answer = _findanswer_lxml(final_round_obj)
+    question = Question((0, 0), text, answer, category, actual_results=actual_results)
+
+    boards.append(FinalBoard(category, question))
+
+    return GameData(boards, date, comments)
+
+
+def get_wayback_game_html(game_id, cancel=None, wait=None):
+    """`wait`, if given, is called before each of the two requests, e.g. to rate limit them"""
     # kudos to Abhi Kumbar: https://medium.com/analytics-vidhya/the-wayback-machine-scraper-63238f6abb66
     # this query's the wayback cdx api for possible instances of the saved jarchive page with the specified game id & returns the latest one
     JArchive_url = f"j-archive.com/showgame.php?game_id={str(game_id)}"  # use the url w/o the http:// or https:// to include both in query
     url = f'http://web.archive.org/cdx/search/cdx?url={JArchive_url}&collapse=digest&limit=-2&fastLatest=true&output=json'  # for some reason, using limit=-1 does not work
-    urls = requests.get(url).text
+    if wait is not None:
+        wait()
+    urls = net.get(url, deadline=10, cancel=cancel).text
     parse_url = json.loads(urls)  # parses the JSON from urls.
     if len(parse_url) == 0:  # if no results, return None
         logging.info("no games found in wayback")
@@ -237,7 +514,9 @@ def get_wayback_game_html(game_id):
         final_url = f'http://web.archive.org/web/{waylink}'
         url_list.append(final_url)
     latest_url = url_list[-1]
-    r = requests.get(latest_url)
+    if wait is not None:
+        wait()
+    r = net.get(latest_url, deadline=20, cancel=cancel)
     return r.text
 
 
@@ -252,7 +531,7 @@ def get_game_sum(soup):
 
 def get_random_game():
     """Use j-archive's random game feature to get a random game id"""
-    r = requests.get("http://j-archive.com/")
+    r = net.get("http://j-archive.com/", deadline=10)
     soup = BeautifulSoup(r.text, "html.parser")
 
     link = soup.find_all(class_="splash_clue_footer")[1].find("a")["href"]
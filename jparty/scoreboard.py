@@ -1,14 +1,15 @@
 from PyQt6.QtGui import QPainter, QPixmap, QImage, QPalette, QColor, QIcon
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QSizePolicy, QPushButton
-from PyQt6.QtCore import Qt, QSize, QPoint
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QSizePolicy, QPushButton, QLabel
+from PyQt6.QtCore import Qt, QSize, QPoint, QTimer
 
-import time
-from threading import Thread
 from base64 import urlsafe_b64decode
 from functools import partial
 
 from jparty.style import MyLabel
 from jparty.utils import resource_path
+from jparty.sprites import sprites
+from jparty.animation import animations
+from jparty.constants import NOISY_JITTER, SCOREBOARD_JOIN_DELAY
 
 
 class NameLabel(MyLabel):
@@ -51,9 +52,8 @@ class PlayerWidget(QWidget):
         super().__init__(parent)
         self.player = player
         self.game = game
-        self.__buzz_hint_thread = None
-        self.__flash_thread = None
-        self.__light_thread = None
+        self.__buzz_hint_animation = None
+        self.__lights_animation = None
 
         self.name_label = NameLabel(player.name, self)
         self.score_label = MyLabel("$0", self.startScoreFontSize, self)
@@ -63,11 +63,10 @@ class PlayerWidget(QWidget):
 
         self.setMouseTracking(True)
 
-        self.main_background = QPixmap(resource_path("player.png"))
-        self.active_background = QPixmap(resource_path("player_active.png"))
-        self.lights_backgrounds = [
-            QPixmap(resource_path(f"player_lights{i}.png")) for i in range(1, 6)
-        ]
+        # sprite names, see sprites.SpriteCache
+        self.main_background = "player.png"
+        self.active_background = "player_active.png"
+        self.lights_backgrounds = [f"player_lights{i}.png" for i in range(1, 6)]
         self.background = self.main_background
 
         self.highlighted = False
@@ -97,6 +96,12 @@ class PlayerWidget(QWidget):
     def resizeEvent(self, event):
         m = int(PlayerWidget.margin * self.width())
         self.setContentsMargins(m, 0, m, 0)
+        # scale every frame now so that light animations only blit
+        for name in [self.main_background, self.active_background, *self.lights_backgrounds]:
+            self.sprite(name)
+
+    def sprite(self, name):
+        return sprites.scaled(name, self.size(), dpr=self.devicePixelRatioF())
 
     def set_lights(self, val):
         self.background = self.active_background if val else self.main_background
@@ -104,12 +109,13 @@ class PlayerWidget(QWidget):
 
     def __buzz_hint(self):
         self.set_lights(True)
-        time.sleep(0.25)
+        yield 0.25
         self.set_lights(False)
 
     def buzz_hint(self):
-        self.__buzz_hint_thread = Thread(target=self.__buzz_hint, name="buzz_hint")
-        self.__buzz_hint_thread.start()
+        if self.__buzz_hint_animation is not None:
+            self.__buzz_hint_animation.cancel()
+        self.__buzz_hint_animation = animations.start(self.__buzz_hint())
 
     def update_score(self):
         score = self.player.score
@@ -123,24 +129,23 @@ class PlayerWidget(QWidget):
         self.score_label.setText(f"{score:,}")
 
     def run_lights(self):
-        self.__light_thread = Thread(target=self.__lights, name="lights")
-        self.__light_thread.start()
+        if self.__lights_animation is not None:
+            self.__lights_animation.cancel()
+        self.__lights_animation = animations.start(self.__lights())
 
     def stop_lights(self):
-        self.__light_thread = None
+        if self.__lights_animation is not None:
+            self.__lights_animation.cancel()
+            self.__lights_animation = None
         self.set_lights(False)
-        self.update()
 
     def __lights(self):
         for img in self.lights_backgrounds:
             self.background = img
             self.update()
-            time.sleep(1.0)
-            if self.__light_thread is None:  # provide stopability
-                return None
+            yield 1.0
 
         self.set_lights(True)
-        self.update()
 
     def mousePressEvent(self, event):
         if self.game.soliciting_player:
@@ -152,7 +157,7 @@ class PlayerWidget(QWidget):
     def paintEvent(self, event):
         qp = QPainter()
         qp.begin(self)
-        qp.drawPixmap(self.rect(), self.background)
+        qp.drawPixmap(0, 0, self.sprite(self.background))
         qp.end()
 
     def leaveEvent(self, event):
@@ -169,6 +174,7 @@ class HostPlayerWidget(PlayerWidget):
         self.remove_button = None
         self.up_button = None
         self.down_button = None
+        self.network_label = None
         super().__init__(game, player, parent)
         self.remove_button = QPushButton("", self)
         # self.remove_button.setStyleSheet("color: red")
@@ -186,6 +192,26 @@ class HostPlayerWidget(PlayerWidget):
         self.down_button.setStyleSheet("QPushButton { font-size: 16px; font-weight: bold; }")
         self.down_button.show()
 
+        # connection quality of the player's phone, see clock.ClockSync
+        self.network_label = QLabel("", self)
+        self.network_label.show()
+        self.network_timer = QTimer(self)
+        self.network_timer.timeout.connect(self.update_network_stats)
+        self.network_timer.start(1000)
+
+    def update_network_stats(self):
+        clock = getattr(self.player.waiter, "clock", None)
+        rtt = clock.rtt() if clock is not None else None
+        if rtt is None:
+            self.network_label.setText("no sync")
+            color = "red"
+        else:
+            jitter = clock.jitter() or 0.0
+            self.network_label.setText(f"{1000 * rtt:.0f}±{1000 * jitter:.0f} ms")
+            color = "red" if jitter > NOISY_JITTER else "white"
+        self.network_label.setStyleSheet(f"QLabel {{ color: {color}; font-size: 11px; }}")
+        self.network_label.adjustSize()
+
     def resizeEvent(self, event):
         super().resizeEvent(event)
         if self.remove_button is not None:
@@ -204,8 +230,18 @@ class HostPlayerWidget(PlayerWidget):
             self.down_button.move(QPoint(self.width() - button_size, self.height() - button_size))
             self.down_button.resize(QSize(button_size, button_size))
 
+        if self.network_label is not None:
+            self.network_label.move(QPoint(0, self.height() - self.network_label.height()))
+
 
 class ScoreBoard(QWidget):
+    """One PlayerWidget per player, in game.players order.
+
+    Layout item 0 is a stretch, followed by each player widget and the
+    stretch after it, so player i's widget is item 2 * i + 1. Players are
+    added, removed and moved one widget at a time. Joins are collected for
+    SCOREBOARD_JOIN_DELAY and laid out together."""
+
     def __init__(self, game, parent=None):
         super().__init__(parent)
 
@@ -216,49 +252,83 @@ class ScoreBoard(QWidget):
         self.player_layout = QHBoxLayout()
         self.player_layout.addStretch()
         self.setLayout(self.player_layout)
+
+        self.__join_timer = QTimer(self)
+        self.__join_timer.setSingleShot(True)
+        self.__join_timer.setInterval(int(1000 * SCOREBOARD_JOIN_DELAY))
+        self.__join_timer.timeout.connect(self.refresh_players)
         self.show()
 
     def minimumHeight(self):
         return 0.2 * self.width()
 
+    def player_joined(self):
+        if not self.__join_timer.isActive():
+            self.__join_timer.start()
+
+    def remove_player(self, player):
+        for pw in self.player_widgets:
+            if pw.player is player:
+                self.__take(pw)
+                pw.deleteLater()
+                break
+        self.__update_buttons()
+
+    def move_player(self, player):
+        """Put player's widget at its player_number, after it swapped places with a neighbour"""
+        pw = self.game.registry.widget(player, self)
+        if pw is None or self.__join_timer.isActive():
+            # its neighbour may not have a widget yet
+            self.refresh_players()
+            return
+        self.__take(pw)
+        self.__insert(player.player_number, pw)
+        self.__update_buttons()
+
     def refresh_players(self):
-        # Remove widgets for players no longer in the game
+        """Bring the widgets in line with game.players, only touching those that changed"""
+        self.__join_timer.stop()
+        self.setUpdatesEnabled(False)
         for pw in list(self.player_widgets):  # copy list so we can remove elements
-            if pw.player not in self.game.players:
-                i = self.player_layout.indexOf(pw)
-                self.player_layout.takeAt(i + 1)  # remove stretch
-                self.player_layout.takeAt(i)
-                self.player_widgets.remove(pw)
+            if pw.player not in self.game.registry:
+                self.__take(pw)
                 pw.deleteLater()
 
-        # Create a mapping of player to widget
-        player_to_widget = {pw.player: pw for pw in self.player_widgets}
-
-        # Rebuild layout in correct order
-        # Clear all widgets and stretches except the initial stretch
-        while self.player_layout.count() > 1:
-            item = self.player_layout.takeAt(1)
-            if item.widget():
-                item.widget().setParent(None)
-        
-        # Reorder player_widgets list and rebuild layout
-        self.player_widgets = []
-        for (i, p) in enumerate(self.game.players):
-            if p in player_to_widget:
-                pw = player_to_widget[p]
-            else:
-                pw = self.create_player_widget(p)
-            self.player_widgets.append(pw)
-            self.player_layout.insertWidget(2 * i + 1, pw)
-            self.player_layout.insertStretch(2 * i + 2)
-            
-            # Enable/disable reorder buttons based on position
-            if hasattr(pw, 'up_button'):
+        for i, p in enumerate(self.game.players):
+            pw = self.game.registry.widget(p, self)
+            if pw is None:
+                self.__add(i, p)
+            elif self.player_widgets[i] is not pw:
+                self.__take(pw)
+                self.__insert(i, pw)
+
+        self.__update_buttons()
+        self.setUpdatesEnabled(True)
+
+    def __add(self, i, player):
+        pw = self.create_player_widget(player)
+        self.game.registry.attach(player, self, pw)
+        self.__insert(i, pw)
+
+    def __insert(self, i, pw):
+        self.player_widgets.insert(i, pw)
+        self.player_layout.insertWidget(2 * i + 1, pw)
+        self.player_layout.insertStretch(2 * i + 2)
+
+    def __take(self, pw):
+        i = self.player_widgets.index(pw)
+        self.player_layout.takeAt(2 * i + 2)  # remove stretch
+        self.player_layout.takeAt(2 * i + 1)
+        self.player_widgets.pop(i)
+
+    def __update_buttons(self):
+        # Enable/disable reorder buttons based on position
+        n = len(self.player_widgets)
+        for i, pw in enumerate(self.player_widgets):
+            if getattr(pw, "up_button", None) is not None:
                 pw.up_button.setEnabled(i > 0)
-            if hasattr(pw, 'down_button'):
-                pw.down_button.setEnabled(i < len(self.game.players) - 1)
-
-        self.update()
+            if getattr(pw, "down_button", None) is not None:
+                pw.down_button.setEnabled(i < n - 1)
 
     def create_player_widget(self, player):
         return PlayerWidget(self.game, player, self)
@@ -266,7 +336,9 @@ class ScoreBoard(QWidget):
     def paintEvent(self, event):
         qp = QPainter()
         qp.begin(self)
-        qp.drawPixmap(self.rect(), QPixmap(resource_path("podium.png")))
+        qp.drawPixmap(
+            0, 0, sprites.scaled("podium.png", self.size(), dpr=self.devicePixelRatioF())
+        )
         qp.end()
 
 
@@ -0,0 +1,45 @@
+from PyQt6.QtGui import QPixmap
+from PyQt6.QtCore import Qt
+
+from collections import OrderedDict
+
+from jparty.utils import resource_path
+
+
+class SpriteCache(object):
+    """Process-wide store of image assets. Each file is read from disk once and
+    scaled copies are kept per target size, so widgets can blit them directly."""
+
+    def __init__(self, max_scaled=256):
+        self.max_scaled = max_scaled
+        self.__originals = {}
+        self.__scaled = OrderedDict()
+
+    def original(self, name):
+        pixmap = self.__originals.get(name)
+        if pixmap is None:
+            pixmap = QPixmap(resource_path(name))
+            self.__originals[name] = pixmap
+        return pixmap
+
+    def scaled(self, name, size, aspect=Qt.AspectRatioMode.IgnoreAspectRatio, dpr=1.0):
+        """`name` scaled to `size` (in device independent pixels)"""
+        key = (name, size.width(), size.height(), aspect, dpr)
+        pixmap = self.__scaled.get(key)
+        if pixmap is not None:
+            self.__scaled.move_to_end(key)
+            return pixmap
+
+        pixmap = self.original(name)
+        if not size.isEmpty() and not pixmap.isNull():
+            pixmap = pixmap.scaled(
+                size * dpr, aspect, transformMode=Qt.TransformationMode.SmoothTransformation
+            )
+            pixmap.setDevicePixelRatio(dpr)
+        self.__scaled[key] = pixmap
+        if len(self.__scaled) > self.max_scaled:
+            self.__scaled.popitem(last=False)
+        return pixmap
+
+
+sprites = SpriteCache()
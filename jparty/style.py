@@ -2,10 +2,11 @@ from PyQt6.QtWidgets import QStyle, QCommonStyle
 from PyQt6.QtGui import QPalette, QColor, QPixmap
 from PyQt6.QtCore import Qt, QRect, QByteArray
 
-import requests
+from jparty import net
 from pathlib import Path
 
 from jparty.utils import DynamicLabel, add_shadow
+from jparty.image_cache import image_cache
 
 
 class JPartyStyle(QCommonStyle):
@@ -33,7 +34,7 @@ def fetch_image_from_url(url: str) -> QPixmap:
     """
     try:
         # Fetch image data from the URL
-        response = requests.get(url)
+        response = net.get(url, deadline=10)
         response.raise_for_status()  # Raise an error for failed requests
         
         # Convert image data to QPixmap
@@ -53,18 +54,29 @@ class MyLabel(DynamicLabel):
             self.font().setBold(True)
             self.setWordWrap(True)
         else:
-            self.question_image = text
-            if not Path(self.question_image).exists():
-                self.question_image_pixmap = fetch_image_from_url(str(self.question_image))
-            else:
+            self.question_image = str(text)
+            # connect before looking in the cache, so an image that finishes
+            # loading in between still reaches image_ready
+            image_cache.image_ready.connect(self.image_ready)
+            self.question_image_pixmap = image_cache.pixmap(self.question_image)
+            if self.question_image_pixmap is None and Path(self.question_image).exists():
                 self.question_image_pixmap = QPixmap(self.question_image)
+            if self.question_image_pixmap is not None:
+                image_cache.image_ready.disconnect(self.image_ready)
+            else:
+                # never block on the network, show the image when it arrives
+                self.question_image_pixmap = QPixmap()
+                image_cache.prefetch([self.question_image])
             self.setText("")
             self.setPixmap(self.question_image_pixmap)
             self.setScaledContents(False)  # Set this to False for proportional scaling
             self.setObjectName("photo")
         self.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-        add_shadow(self)
+        if image:
+            add_shadow(self)
+        else:
+            self.setTextShadow()
 
         palette = QPalette()
         palette.setColor(QPalette.ColorRole.WindowText, QColor("white"))
@@ -72,9 +84,22 @@ class MyLabel(DynamicLabel):
 
         self.show()
 
+    def image_ready(self, url):
+        if url != self.question_image:
+            return
+        try:
+            image_cache.image_ready.disconnect(self.image_ready)
+        except TypeError:  # already found in the cache, or already delivered
+            return
+        self.question_image_pixmap = image_cache.pixmap(url)
+        self.fit_pixmap()
+
     def resizeEvent(self, event):
         """Override the resize event to rescale the image."""
         super().resizeEvent(event)
+        self.fit_pixmap()
+
+    def fit_pixmap(self):
         if hasattr(self, 'question_image_pixmap') and self.question_image_pixmap:
             # Scale the pixmap to fit the label's size while keeping the aspect ratio
             scaled_pixmap = self.question_image_pixmap.scaled(
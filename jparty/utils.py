@@ -1,15 +1,27 @@
 import simpleaudio as sa
 
 from threading import Thread
+from functools import lru_cache
+from collections import OrderedDict
 import re
+import math
 import os
 import sys
-import requests
 
 
-from PyQt6.QtGui import QColor, QFontMetrics
-from PyQt6.QtWidgets import QGraphicsDropShadowEffect, QLabel, QPushButton, QSizePolicy
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QImage, QPainter, QPalette, QPixmap
+from PyQt6.QtWidgets import (
+    QGraphicsDropShadowEffect,
+    QGraphicsPixmapItem,
+    QGraphicsScene,
+    QLabel,
+    QPushButton,
+    QSizePolicy,
+    QWidget,
+)
+from PyQt6.QtCore import Qt, QSize, QRect, QRectF
+
+from jparty.wikimedia import wikimedia
 
 
 def resource_path(relative_path):
@@ -96,11 +108,121 @@ def add_shadow(widget, radius=0.1, offset=3):
     widget.setGraphicsEffect(shadow)
 
 
+SHADOW_CACHE_SIZE = 256
+_shadow_cache = OrderedDict()
+
+
+def shadow_margin(blur, offset):
+    """How far a drop shadow can reach past the edge of what casts it"""
+    return int(math.ceil(blur + abs(offset)))
+
+
+def drop_shadow(image, blur, offset):
+    """Composite `image` over its blurred black shadow, exactly as
+    QGraphicsDropShadowEffect would draw it. The result is padded by
+    shadow_margin on every side so the shadow is not cut off; draw it
+    that far up and left of where `image` goes."""
+    dpr = image.devicePixelRatio()
+    margin = shadow_margin(blur, offset)
+    source = QRectF(
+        -margin,
+        -margin,
+        image.width() / dpr + 2 * margin,
+        image.height() / dpr + 2 * margin,
+    )
+    target = QRectF(0, 0, source.width(), source.height())
+
+    effect = QGraphicsDropShadowEffect()
+    effect.setBlurRadius(blur)
+    effect.setColor(QColor("black"))
+    effect.setOffset(offset)
+    item = QGraphicsPixmapItem(QPixmap.fromImage(image))
+    item.setGraphicsEffect(effect)
+    scene = QGraphicsScene()
+    scene.addItem(item)
+
+    result = QImage(
+        int(target.width() * dpr),
+        int(target.height() * dpr),
+        QImage.Format.Format_ARGB32_Premultiplied,
+    )
+    result.setDevicePixelRatio(dpr)
+    result.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(result)
+    scene.render(painter, target, source)
+    painter.end()
+    return QPixmap.fromImage(result)
+
+
+def shadowed_text(label, blur, offset):
+    """Pixmap of `label`'s text over its drop shadow. Rendered once per
+    text, size, font and colour and shared by every label that matches."""
+    dpr = label.devicePixelRatioF()
+    key = (
+        label.text(),
+        label.width(),
+        label.height(),
+        label.font().toString(),
+        label.palette().color(QPalette.ColorRole.WindowText).rgba(),
+        int(label.alignment().value),
+        label.wordWrap(),
+        blur,
+        offset,
+        dpr,
+    )
+    pixmap = _shadow_cache.get(key)
+    if pixmap is not None:
+        _shadow_cache.move_to_end(key)
+        return pixmap
+
+    image = QImage(
+        int(label.width() * dpr),
+        int(label.height() * dpr),
+        QImage.Format.Format_ARGB32_Premultiplied,
+    )
+    image.setDevicePixelRatio(dpr)
+    image.fill(Qt.GlobalColor.transparent)
+    label.render(image, flags=QWidget.RenderFlag(0))  # just the text, no background
+    pixmap = drop_shadow(image, blur, offset)
+
+    _shadow_cache[key] = pixmap
+    if len(_shadow_cache) > SHADOW_CACHE_SIZE:
+        _shadow_cache.popitem(last=False)
+    return pixmap
+
+
+@lru_cache(maxsize=4096)
+def fit_font_size(text, width, height, flags, font_key, initial):
+    """Largest pixel size no bigger than `initial` at which `text` fits in a
+    width x height rect, found by bisection. Never goes below 2.
+    Shared by every autosizing widget, so identical cards fit only once."""
+    rect = QRect(0, 0, width, height)
+    font = QFont()
+    font.fromString(font_key)
+
+    def fits(size):
+        font.setPixelSize(size)
+        return rect.contains(QFontMetrics(font).boundingRect(rect, flags, text))
+
+    if initial <= 2 or fits(initial):
+        return initial
+
+    lo, hi = 2, initial - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if fits(mid):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
 class AutosizeWidget(object):
     """This class is a mixin which must be inherited with a QWidget with a `text()` method."""
 
     def __init__(self, *args, **kwargs):
         self.autosize_margins = (0.0, 0.0, 0.0, 0.0)  # as percentage of size
+        self.autosize_managed = False  # if True, a parent sets the font size
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         self.autoresize()
 
@@ -117,13 +239,16 @@ class AutosizeWidget(object):
         self.autoresize()
 
     def autoresize(self):
-        if self.size().height() == 0 or self.text() == "":
+        if self.autosize_managed or self.size().height() == 0 or self.text() == "":
             return None
 
-        fontsize = self.autofitsize()
+        self.setFontPixelSize(self.autofitsize())
+
+    def setFontPixelSize(self, fontsize):
         font = self.font()
-        font.setPixelSize(fontsize)
-        self.setFont(font)
+        if font.pixelSize() != fontsize:
+            font.setPixelSize(fontsize)
+            self.setFont(font)
 
     def plaintext(self):
         text = self.text()
@@ -148,10 +273,7 @@ class AutosizeWidget(object):
         else:
             raise Exception("Need 1, 2, or 4 arguments")
 
-    def autofitsize(self, stepsize=1):
-
-        font = self.font()
-
+    def autofitsize(self):
         ml, mt, mr, md = self.autosize_margins
         rect = self.rect().adjusted(
             int(self.width() * ml),
@@ -160,32 +282,48 @@ class AutosizeWidget(object):
             int(-self.height() * mt),
         )
 
-        text = self.plaintext()
-
-        font.setPixelSize(int(self.initialSize()))
-        size = font.pixelSize()
-
-        def fullrect(font):
-            fm = QFontMetrics(font)
-            return fm.boundingRect(rect, self.flags(), text)
-
-        newrect = fullrect(font)
-        if not rect.contains(newrect):
-            while size > 2:
-                size -= stepsize
-                font.setPixelSize(size)
-                newrect = fullrect(font)
-                if rect.contains(newrect):
-                    return font.pixelSize()
-
-        return size
+        # the font's own size doesn't matter, only its family and style
+        font = QFont(self.font())
+        font.setPixelSize(1)
+
+        return fit_font_size(
+            self.plaintext(),
+            rect.width(),
+            rect.height(),
+            self.flags(),
+            font.toString(),
+            max(int(self.initialSize()), 1),
+        )
 
 
 class DynamicLabel(QLabel, AutosizeWidget):
     def __init__(self, text, initialSize, parent=None):
         self.__initialSize = initialSize
+        self.__shadow = None
+        self.__painting_text = False
         super().__init__(text, parent)
 
+    def setTextShadow(self, offset=3):
+        """Draw the text over a drop shadow like add_shadow's, but from a
+        cached pixmap instead of re-blurring on every repaint"""
+        # add_shadow uses the height at the time it is called as the blur
+        self.__shadow = (self.height(), offset)
+        self.update()
+
+    def paintEvent(self, event):
+        if self.__shadow is None or self.__painting_text or self.text() == "" or self.width() == 0:
+            return super().paintEvent(event)
+
+        self.__painting_text = True
+        try:
+            pixmap = shadowed_text(self, *self.__shadow)
+        finally:
+            self.__painting_text = False
+        margin = shadow_margin(*self.__shadow)
+        painter = QPainter(self)
+        painter.drawPixmap(-margin, -margin, pixmap)
+        painter.end()
+
     def flags(self):
         flags = 0
         if self.wordWrap():
@@ -227,24 +365,4 @@ class DynamicButton(QPushButton, AutosizeWidget):
         return 0
     
 def search_wikimedia_image(query):
-    url = "https://en.wikipedia.org/w/api.php"
-    header = {
-        "User-Agent": "J-NoChance/0.1 (trevorspreadbury@gmail.com)"
-    }
-    params = {
-        "action": "query",
-        "format": "json",
-        "prop": "pageimages",
-        "titles": query,
-        "pithumbsize": 500,
-    }
-    response = requests.get(url, params=params, headers=header)
-    if response.status_code == 200:
-        data = response.json()
-        pages = data.get("query", {}).get("pages", {})
-        for page_id, page_data in pages.items():
-            if "thumbnail" in page_data:
-                return page_data["thumbnail"]["source"]
-        return "No image found."
-    else:
-        return f"Error: {response.status_code}"
+    return wikimedia.search(query)
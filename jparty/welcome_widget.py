@@ -11,12 +11,12 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QSize, pyqtSignal, QTimer
 
 import qrcode
-import time
 from threading import Thread
 import logging
 
 from jparty.version import version
-from jparty.retrieve import get_game, get_random_game
+from jparty.retrieve import get_game
+from jparty.random_pool import random_pool
 from jparty.utils import resource_path, add_shadow, DynamicLabel, DynamicButton
 from jparty.helpmsg import helpmsg
 from jparty.style import WINDOWPAL
@@ -181,6 +181,8 @@ class Welcome(StartWidget):
 
         self.setLayout(main_layout)
 
+        random_pool.start()
+
         self.show()
 
     def show_help(self):
@@ -205,14 +207,8 @@ class Welcome(StartWidget):
 
     def __random(self):
         try:
-            while True:
-                game_id = get_random_game()
-                logging.info(f"GAMEID {game_id}")
-                self.game.data = get_game(game_id)
-                if self.game.valid_game():
-                    break
-                else:
-                    time.sleep(0.25)
+            game_id, self.game.data = random_pool.take()
+            logging.info(f"GAMEID {game_id}")
 
             self.gameid_trigger.emit(str(game_id))
             self.summary_trigger.emit(self.game.data.date + "\n" + self.game.data.comments)
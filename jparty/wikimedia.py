@@ -0,0 +1,112 @@
+import json
+import time
+import logging
+import threading
+
+import requests
+
+from jparty import net
+from jparty.image_cache import image_cache
+from jparty.constants import WIKIMEDIA_CACHE, WIKIMEDIA_CACHE_DAYS
+
+API_URL = "https://en.wikipedia.org/w/api.php"
+HEADER = {"User-Agent": "J-NoChance/0.1 (trevorspreadbury@gmail.com)"}
+MAX_TITLES = 50  # MediaWiki limit on titles per query
+NO_IMAGE = "No image found."
+
+
+class WikimediaResolver(object):
+    """Resolves queries to Wikipedia page thumbnails, with a persistent
+    query -> url cache. Misses are cached too, as None."""
+
+    def __init__(self, path=WIKIMEDIA_CACHE, ttl=WIKIMEDIA_CACHE_DAYS * 86400):
+        self.path = path
+        self.ttl = ttl
+        self.__lock = threading.Lock()
+        try:
+            with path.open("r") as f:
+                self.__cache = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.__cache = {}
+
+    def cached(self, query):
+        """(True, url or None) if query was resolved within the ttl, else (False, None)"""
+        with self.__lock:
+            entry = self.__cache.get(query)
+        if entry is None or time.time() - entry[1] > self.ttl:
+            return False, None
+        return True, entry[0]
+
+    def __store(self, results):
+        now = time.time()
+        with self.__lock:
+            for query, url in results.items():
+                self.__cache[query] = [url, now]
+            with self.path.open("w") as f:
+                json.dump(self.__cache, f)
+
+    def __query(self, titles, cancel=None):
+        params = {
+            "action": "query",
+            "format": "json",
+            "prop": "pageimages",
+            "titles": "|".join(titles),
+            "pithumbsize": 500,
+            "pilimit": MAX_TITLES,
+        }
+        response = net.get(API_URL, params=params, headers=HEADER, deadline=5, cancel=cancel)
+        response.raise_for_status()
+        data = response.json().get("query", {})
+        normalized = {n["from"]: n["to"] for n in data.get("normalized", [])}
+        thumbnails = {
+            page.get("title"): page["thumbnail"]["source"]
+            for page in data.get("pages", {}).values()
+            if "thumbnail" in page
+        }
+        return {t: thumbnails.get(normalized.get(t, t)) for t in titles}
+
+    def resolve_many(self, queries):
+        """Resolve every query not already cached, MAX_TITLES per request"""
+        todo = []
+        for query in dict.fromkeys(queries):
+            if query and not self.cached(query)[0]:
+                todo.append(query)
+        # "|" separates titles, so those queries can't share a request
+        batches = [[q] for q in todo if "|" in q]
+        batchable = [q for q in todo if "|" not in q]
+        batches += [batchable[i : i + MAX_TITLES] for i in range(0, len(batchable), MAX_TITLES)]
+        for batch in batches:
+            try:
+                self.__store(self.__query(batch))
+            except Exception as e:
+                logging.error(f"Wikimedia lookup failed: {e}")
+        return {q: self.cached(q)[1] for q in queries}
+
+    def search(self, query, cancel=None):
+        """Thumbnail url for query, or a message if there is none"""
+        hit, url = self.cached(query)
+        if not hit:
+            try:
+                url = self.__query([query], cancel)[query]
+            except requests.exceptions.HTTPError as e:
+                return f"Error: {e.response.status_code}"
+            self.__store({query: url})
+        return url if url is not None else NO_IMAGE
+
+    def prefetch_game(self, game_data):
+        """Resolve and download images for all image-likely clues, in the background"""
+        questions = [
+            q
+            for board in game_data.rounds
+            for q in board.questions
+            if q.image and not q.image_url
+        ]
+
+        def run():
+            urls = self.resolve_many([q.answer for q in questions])
+            image_cache.prefetch(url for url in urls.values() if url)
+
+        threading.Thread(target=run, name="wikimedia_prefetch", daemon=True).start()
+
+
+wikimedia = WikimediaResolver()